@@ -0,0 +1,141 @@
+"""Times parsing, queries and assertions against a synthetic terraform directory.
+
+Each stage is timed on its own, and the results are written as JSON so that
+runs against different versions can be compared:
+
+    python benchmarks/benchmark.py --output before.json
+    python benchmarks/benchmark.py --output after.json --compare before.json
+
+With --compare, the command exits with a status of 1 when a stage is slower
+than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import hcl
+import terraform_validate as t
+from synthetic import write_terraform_directory
+
+RESOURCE_TYPES = "aws_type_.*"
+
+# time.perf_counter() is not available on Python 2
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def time_stage(setup, stage, repeat):
+    # setup() runs before each repetition and is not timed, its result is passed to stage()
+    timings = []
+    for i in range(repeat):
+        state = setup()
+        start = timer()
+        stage(state)
+        timings.append(timer() - start)
+    timings.sort()
+    return {
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'max': timings[-1],
+        'repeat': repeat,
+    }
+
+
+def loaded_validator(terraform_config, variable_expand=False):
+    def setup():
+        v = t.Validator(terraform_config)
+        if variable_expand:
+            v.enable_variable_expansion()
+        return v
+    return setup
+
+
+def run_benchmarks(path, repeat):
+    terraform_config = t.Validator(path).terraform_config
+    stages = [
+        ("parse_terraform_directory", t.Validator,
+         lambda v: v.parse_terraform_directory(path)),
+        ("resources", loaded_validator(terraform_config),
+         lambda v: v.resources(RESOURCE_TYPES)),
+        ("property", loaded_validator(terraform_config),
+         lambda v: v.resources(RESOURCE_TYPES).property("ebs_block_device").property("options").property("iops")),
+        ("should_match_regex", loaded_validator(terraform_config),
+         lambda v: v.resources(RESOURCE_TYPES).property("tags").property("Name").should_match_regex("^resource_[0-9_]+$")),
+        ("variable_expansion", loaded_validator(terraform_config, variable_expand=True),
+         lambda v: v.resources(RESOURCE_TYPES).property("name").should_match_regex("^production-resource_[0-9_]+$")),
+        ("property_table", loaded_validator(terraform_config),
+         lambda v: v.resources(RESOURCE_TYPES).property("ebs_block_device").property("encrypted").table().should_equal_rows(True)),
+    ]
+    results = {}
+    for name, setup, stage in stages:
+        results[name] = time_stage(setup, stage, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Outputs the names of the stages that are slower than the baseline by more than threshold
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = result['min'] / baseline[name]['min']
+        print("{0:<28} {1:>10.4f}s {2:>10.4f}s {3:>7.2f}x".format(name, baseline[name]['min'], result['min'], ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times terraform_validate against a synthetic terraform directory")
+    parser.add_argument("--files", type=int, default=20, help="number of .tf files (default: 20)")
+    parser.add_argument("--resources", type=int, default=50, help="resources per file (default: 50)")
+    parser.add_argument("--types", type=int, default=10, help="number of resource types (default: 10)")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of each stage, the fastest is compared (default: 5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="name stored with the results, eg. a version number")
+    parser.add_argument("--output", default=None, help="file to write the JSON results to, instead of stdout")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fraction a stage may be slower than the baseline before it fails (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    path = tempfile.mkdtemp()
+    try:
+        write_terraform_directory(path, args.files, args.resources, args.types, args.seed)
+        results = run_benchmarks(path, args.repeat)
+    finally:
+        shutil.rmtree(path)
+
+    report = {
+        'label': args.label,
+        'python': platform.python_version(),
+        'pyhcl': getattr(hcl, '__version__', None),
+        'parameters': {'files': args.files, 'resources': args.resources, 'types': args.types, 'seed': args.seed},
+        'results': results,
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        if baseline['parameters'] != report['parameters']:
+            print("Warning: {0} was run with different parameters".format(args.compare))
+        regressions = compare(results, baseline['results'], args.threshold)
+        if len(regressions) > 0:
+            print("Slower than {0}: {1}".format(args.compare, ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
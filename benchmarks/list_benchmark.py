@@ -0,0 +1,89 @@
+"""Times the list and property name checks on lists with thousands of entries.
+
+Compares list_should_contain, list_should_not_contain and should_have_properties
+with the list scans they used before they looked values up in sets:
+
+    python benchmarks/list_benchmark.py [--entries N] [--resources N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import terraform_validate as t
+from benchmark import time_stage
+
+
+def list_scan_contain(properties, values_list):
+    errors = 0
+    for property in properties:
+        missing = [value for value in values_list if value not in property.property_value]
+        errors += len(missing) > 0
+    return errors
+
+
+def list_scan_not_contain(properties, values_list):
+    errors = 0
+    for property in properties:
+        found = [value for value in values_list if value in property.property_value]
+        errors += len(found) > 0
+    return errors
+
+
+def key_scan_have_properties(resources, properties_list):
+    errors = 0
+    for resource in resources:
+        # As the check was written, keys() is a list on Python 2 but a view with O(1) lookups on Python 3
+        property_names = resource.config.keys()
+        errors += len([name for name in properties_list if name not in property_names])
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the list checks on long lists")
+    parser.add_argument("--entries", type=int, default=5000, help="entries in each list and map (default: 5000)")
+    parser.add_argument("--resources", type=int, default=20, help="number of resources (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of each check (default: 3)")
+    parser.add_argument("--output", default=None, help="file to write the JSON results to")
+    args = parser.parse_args(argv)
+
+    actions = ["s3:Action{0}".format(i) for i in range(args.entries)]
+    resources = {}
+    for i in range(args.resources):
+        config = {'actions': actions}
+        for action in actions:
+            config[action] = True
+        resources["policy_{0}".format(i)] = config
+    v = t.Validator({'resource': {'aws_iam_policy': resources}})
+    v.collect_violations()
+    expected = actions[::-1]
+    missing = ["s3:Missing{0}".format(i) for i in range(args.entries)]
+    properties = v.resources("aws_iam_policy").property("actions")
+
+    stages = [
+        ("list_should_contain", lambda: properties.list_should_contain(expected)),
+        ("list_should_contain (list scan)", lambda: list_scan_contain(properties.properties, expected)),
+        ("list_should_not_contain", lambda: properties.list_should_not_contain(missing)),
+        ("list_should_not_contain (list scan)", lambda: list_scan_not_contain(properties.properties, missing)),
+        ("should_have_properties", lambda: v.resources("aws_iam_policy").should_have_properties(expected)),
+        ("should_have_properties (key scan)", lambda: key_scan_have_properties(v.resources("aws_iam_policy").resource_list, expected)),
+    ]
+    results = {}
+    for name, stage in stages:
+        results[name] = time_stage(lambda: None, lambda state: stage(), args.repeat)
+        print("{0:<36} {1:>10.4f}s".format(name, results[name]['min']))
+
+    if args.output is not None:
+        with open(args.output, "w") as fp:
+            json.dump({
+                'python': platform.python_version(),
+                'parameters': {'entries': args.entries, 'resources': args.resources},
+                'results': results,
+            }, fp, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
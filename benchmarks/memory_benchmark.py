@@ -0,0 +1,71 @@
+"""Measures the memory used by the objects that queries create.
+
+Compares the slotted TerraformResource and TerraformProperty classes with
+plain classes that keep a per-instance __dict__. Needs Python 3.4+ for tracemalloc.
+
+    python benchmarks/memory_benchmark.py [resource_count]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import terraform_validate as t
+from synthetic import generate_terraform_config
+
+
+class DictTerraformResource:
+
+    def __init__(self, type, name, config):
+        self.type = type
+        self.name = name
+        self.config = config
+
+
+class DictTerraformProperty:
+
+    def __init__(self, resource_type, resource_name, property_name, property_value):
+        self.resource_type = resource_type
+        self.resource_name = resource_name
+        self.property_name = property_name
+        self.property_value = property_value
+
+
+def measure(build):
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(objects)
+
+
+def build_resources(resource_class, resources):
+    return [resource_class(resource_type, name, config)
+            for resource_type in resources
+            for name, config in resources[resource_type].items()]
+
+
+def build_properties(property_class, resources):
+    return [property_class(resource_type, name, 'value', config['value'])
+            for resource_type in resources
+            for name, config in resources[resource_type].items()]
+
+
+def main():
+    resource_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    resources = generate_terraform_config(resource_count)['resource']
+
+    print("{0} resources".format(resource_count))
+    for label, build in [
+        ("TerraformResource", lambda: build_resources(t.TerraformResource, resources)),
+        ("TerraformResource (__dict__)", lambda: build_resources(DictTerraformResource, resources)),
+        ("TerraformProperty", lambda: build_properties(t.TerraformProperty, resources)),
+        ("TerraformProperty (__dict__)", lambda: build_properties(DictTerraformProperty, resources)),
+    ]:
+        size, count = measure(build)
+        print("{0:<30} {1:>12} bytes {2:>8.1f} bytes/object".format(label, size, float(size) / count))
+
+
+if __name__ == '__main__':
+    main()
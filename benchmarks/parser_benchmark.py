@@ -0,0 +1,59 @@
+"""Compares the parser backends on the same synthetic terraform files.
+
+The .tf backends parse the generated HCL, and the json backend parses the
+same files after they were converted to .tf.json. Every backend must give the
+same result as hcl.loads():
+
+    python benchmarks/parser_benchmark.py [--files N] [--resources N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import hcl
+import terraform_validate as t
+from benchmark import time_stage
+from synthetic import generate_terraform_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares the terraform_validate parser backends")
+    parser.add_argument("--files", type=int, default=10, help="number of files (default: 10)")
+    parser.add_argument("--resources", type=int, default=50, help="resources per file (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of each backend (default: 3)")
+    parser.add_argument("--output", default=None, help="file to write the JSON results to")
+    args = parser.parse_args(argv)
+
+    sources = [generate_terraform_file(file_index, args.resources) for file_index in range(args.files)]
+    expected = [hcl.loads(source) for source in sources]
+    json_sources = [json.dumps(terraform) for terraform in expected]
+
+    results = {}
+    for backend in [t.TerraformPyhclBackend(), t.TerraformPyhclParserBackend(), t.TerraformJsonBackend()]:
+        if not backend.available():
+            continue
+        inputs = json_sources if backend.name == 'json' else sources
+        if [backend.parse(source) for source in inputs] != expected:
+            raise AssertionError("The {0} backend does not give the same results as hcl.loads()".format(backend.name))
+        results[backend.name] = time_stage(lambda: None, lambda state: [backend.parse(source) for source in inputs], args.repeat)
+
+    baseline = results['pyhcl']['min']
+    for name, result in sorted(results.items(), key=lambda item: item[1]['min']):
+        print("{0:<14} {1:>10.4f}s {2:>7.1f}x".format(name, result['min'], baseline / result['min']))
+
+    if args.output is not None:
+        with open(args.output, "w") as fp:
+            json.dump({
+                'python': platform.python_version(),
+                'pyhcl': getattr(hcl, '__version__', None),
+                'parameters': {'files': args.files, 'resources': args.resources},
+                'results': results,
+            }, fp, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import random
+
+
+def generate_terraform_config(resource_count, resource_type_count=10, seed=0):
+    # Builds the same kind of dict that Validator.parse_terraform_directory() returns
+    rng = random.Random(seed)
+    resources = {}
+    for i in range(resource_count):
+        resource_type = "aws_type_{0}".format(i % resource_type_count)
+        resources.setdefault(resource_type, {})["resource_{0}".format(i)] = {
+            'value': rng.randint(0, 9),
+            'encrypted': rng.choice([True, False, "true", "false"]),
+            'tags': {'Name': "resource_{0}".format(i), 'owner': "team_{0}".format(i % 7)},
+            'ebs_block_device': [{'encrypted': True}, {'encrypted': rng.choice([True, False])}],
+        }
+    return {
+        'variable': {'environment': {'default': 'Production'}},
+        'resource': resources,
+    }
+
+
+def generate_terraform_file(file_index, resource_count, resource_type_count=10, seed=0):
+    # Renders HCL with nested blocks and ${var.*} interpolations, one variable per file
+    rng = random.Random("{0}-{1}".format(seed, file_index))
+    blocks = ['variable "owner_{0}" {{\n  default = "team_{0}"\n}}\n'.format(file_index)]
+    for i in range(resource_count):
+        name = "resource_{0}_{1}".format(file_index, i)
+        blocks.append(
+            'resource "aws_type_{type}" "{name}" {{\n'
+            '  value = {value}\n'
+            '  name = "${{var.environment}}-{name}"\n'
+            '  tags {{\n'
+            '    Name = "{name}"\n'
+            '    owner = "${{var.owner_{file_index}}}"\n'
+            '  }}\n'
+            '  ebs_block_device {{\n'
+            '    encrypted = true\n'
+            '    options {{\n'
+            '      iops = {iops}\n'
+            '    }}\n'
+            '  }}\n'
+            '  ebs_block_device {{\n'
+            '    encrypted = {encrypted}\n'
+            '  }}\n'
+            '}}\n'.format(type=rng.randint(0, resource_type_count - 1), name=name, file_index=file_index,
+                          value=rng.randint(0, 9), iops=rng.randint(100, 1000),
+                          encrypted=rng.choice(["true", "false"])))
+    return "\n".join(blocks)
+
+
+def write_terraform_directory(path, file_count, resources_per_file, resource_type_count=10, seed=0):
+    # Writes file_count .tf files, half of them in a nested directory, plus a variables file
+    nested = os.path.join(path, "nested")
+    if not os.path.isdir(nested):
+        os.makedirs(nested)
+    with open(os.path.join(path, "variables.tf"), "w") as fp:
+        fp.write('variable "environment" {\n  default = "production"\n}\n')
+    for file_index in range(file_count):
+        directory = nested if file_index % 2 else path
+        with open(os.path.join(directory, "file_{0}.tf".format(file_index)), "w") as fp:
+            fp.write(generate_terraform_file(file_index, resources_per_file, resource_type_count, seed))
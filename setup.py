@@ -13,4 +13,9 @@ setup(
     install_requires=[
         "pyhcl"
     ],
+    entry_points={
+        "console_scripts": [
+            "terraform-validate=terraform_validate.cli:main",
+        ],
+    },
 )
@@ -0,0 +1,226 @@
+import argparse
+import copy
+import multiprocessing
+import os
+import sys
+import time
+
+from .terraform_validate import Validator, TerraformViolationCollector, TerraformWatcher
+
+try:
+    import importlib.util
+except ImportError:
+    import imp
+import importlib
+
+# Policy modules already imported by this process, keyed by the name or path given on the command line
+policy_modules = {}
+
+
+def load_policy_module(policy):
+    if policy not in policy_modules:
+        if os.path.isfile(policy):
+            name = os.path.splitext(os.path.basename(policy))[0]
+            if hasattr(importlib, 'util'):
+                spec = importlib.util.spec_from_file_location(name, policy)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            else:
+                module = imp.load_source(name, policy)
+        else:
+            module = importlib.import_module(policy)
+        policy_modules[policy] = module
+    return policy_modules[policy]
+
+
+def get_policies(module):
+    return [(name, getattr(module, name)) for name in sorted(dir(module))
+            if name.startswith("policy_") and callable(getattr(module, name))]
+
+
+def stream_root(module, root, cache_dir):
+    # Parses each .tf file once, and runs RULES and every policy against it before moving on to the next file
+    rules = getattr(module, "RULES", [])
+    policies = get_policies(module)
+    collectors = [TerraformViolationCollector() for policy in policies]
+    failed = [False] * len(policies)
+    messages = []
+    errors = []
+
+    try:
+        for file_validator in Validator(cache_dir=cache_dir).iter_file_validators(root):
+            if len(rules) > 0:
+                for result in file_validator.run_rules(rules):
+                    messages.extend(result.errors)
+            for index, (name, policy_function) in enumerate(policies):
+                if failed[index]:
+                    continue
+                # Each policy gets its own copy, so behaviour functions do not leak between policies
+                validator = copy.copy(file_validator)
+                validator.terraform_config = file_validator.terraform_config
+                validator.collect_violations(collectors[index])
+                try:
+                    policy_function(validator)
+                except AssertionError as e:
+                    messages.append("{0}: {1}".format(name, e))
+                    failed[index] = True
+                except Exception as e:
+                    errors.append("{0}: {1}: {2}".format(name, type(e).__name__, e))
+                    failed[index] = True
+    except Exception as e:
+        return root, sorted(messages), errors + ["{0}: {1}".format(type(e).__name__, e)]
+
+    for collector in collectors:
+        messages.extend(collector.messages())
+    return root, sorted(messages), errors
+
+
+def validate_root(args):
+    # Runs in a worker process, so it has to be a module level function
+    policy, root, cache_dir, stream = args
+    module = load_policy_module(policy)
+    if stream:
+        return stream_root(module, root, cache_dir)
+    messages = []
+    errors = []
+
+    try:
+        validator = Validator.for_path(root, cache_dir=cache_dir)
+        rules = getattr(module, "RULES", [])
+        if len(rules) > 0:
+            for result in validator.check_all(rules):
+                messages.extend(result.errors)
+    except Exception as e:
+        return root, messages, ["{0}: {1}".format(type(e).__name__, e)]
+
+    for name, policy_function in get_policies(module):
+        # Each policy gets its own Validator, so behaviour functions do not leak between policies
+        validator = Validator.for_path(root, cache_dir=cache_dir)
+        collector = validator.collect_violations()
+        try:
+            policy_function(validator)
+        except AssertionError as e:
+            messages.append("{0}: {1}".format(name, e))
+        except Exception as e:
+            errors.append("{0}: {1}: {2}".format(name, type(e).__name__, e))
+        messages.extend(collector.messages())
+
+    return root, sorted(messages), errors
+
+
+def named_policy(name, policy_function):
+    def check(validator):
+        try:
+            policy_function(validator)
+        except AssertionError as e:
+            raise AssertionError("{0}: {1}".format(name, e))
+    return check
+
+
+def register_policies(watcher, module):
+    watcher.rules = []
+    watcher.checks = []
+    for rule in getattr(module, "RULES", []):
+        watcher.register(rule)
+    for name, policy_function in get_policies(module):
+        watcher.register(named_policy(name, policy_function))
+
+
+def get_policy_mtime(policy):
+    if os.path.isfile(policy):
+        return os.stat(policy).st_mtime
+    return None
+
+
+def watch(policy, roots, interval, cache_dir, iterations=None):
+    # Keeps every root parsed in memory, and checks it again whenever one of its files or the policy file changes
+    watchers = [TerraformWatcher(root, interval=interval, cache_dir=cache_dir) for root in roots]
+    module = load_policy_module(policy)
+    policy_mtime = get_policy_mtime(policy)
+    for watcher in watchers:
+        register_policies(watcher, module)
+
+    while iterations is None or iterations > 0:
+        mtime = get_policy_mtime(policy)
+        if mtime != policy_mtime:
+            policy_mtime = mtime
+            del policy_modules[policy]
+            try:
+                module = load_policy_module(policy)
+            except Exception as e:
+                print("{0}: {1}: {2}".format(policy, type(e).__name__, e))
+            else:
+                for watcher in watchers:
+                    register_policies(watcher, module)
+
+        for watcher in watchers:
+            messages = watcher.poll()
+            if messages is None:
+                continue
+            for message in messages:
+                for line in message.split("\n"):
+                    print("{0}: {1}".format(watcher.path, line))
+            print("{0}: {1} errors".format(watcher.path, len(messages)))
+        sys.stdout.flush()
+
+        if iterations is not None:
+            iterations -= 1
+            if iterations == 0:
+                break
+        time.sleep(interval)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="terraform-validate",
+                                     description="Checks terraform configurations against a module of policies")
+    parser.add_argument("policy", help="python file or importable module defining RULES and/or policy_* functions that take a Validator")
+    parser.add_argument("roots", nargs="+", help="terraform directories to check")
+    parser.add_argument("-j", "--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of directories to check in parallel (default: number of CPUs)")
+    parser.add_argument("--cache-dir", default=None, help="directory for the on-disk parse cache")
+    parser.add_argument("--stream", action="store_true",
+                        help="check one .tf file at a time instead of the merged configuration, to bound memory use")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="keep running, and check a directory again whenever its .tf files or the policy file change")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between polls in watch mode (default: 0.5)")
+    args = parser.parse_args(argv)
+
+    # Fail early on a policy module that cannot be imported
+    load_policy_module(args.policy)
+
+    if args.watch:
+        try:
+            return watch(args.policy, args.roots, args.interval, args.cache_dir)
+        except KeyboardInterrupt:
+            return 0
+
+    jobs = [(args.policy, root, args.cache_dir, args.stream) for root in args.roots]
+    workers = min(args.workers, len(jobs))
+    if workers < 2:
+        results = [validate_root(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(validate_root, jobs, 1)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    failed = 0
+    for root, messages, errors in results:
+        for message in messages + errors:
+            for line in message.split("\n"):
+                print("{0}: {1}".format(root, line))
+        if len(messages) > 0 or len(errors) > 0:
+            failed += 1
+
+    print("{0} of {1} terraform directories failed".format(failed, len(results)))
+    if failed > 0:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+resource "foo" "bar" {
+    array = ["1","2","3"
+}
\ No newline at end of file
@@ -0,0 +1,20 @@
+module "web" {
+    source = "./modules/server"
+    instance_type = "t2.micro"
+}
+
+module "db" {
+    source = "./modules/server"
+}
+
+module "network" {
+    source = "./modules/network"
+}
+
+module "consul" {
+    source = "hashicorp/consul/aws"
+}
+
+resource "aws_s3_bucket" "logs" {
+    acl = "private"
+}
@@ -0,0 +1,7 @@
+variable "instance_type" {
+    default = "t2.small"
+}
+
+resource "aws_instance" "server" {
+    instance_type = "${var.instance_type}"
+}
@@ -0,0 +1,7 @@
+variable "foo" {
+    default = "1"
+}
+
+resource "aws_instance" "foo" {
+    value = 1
+}
@@ -0,0 +1,7 @@
+resource "aws_instance" "bar" {
+    value = 1
+}
+
+resource "aws_elb" "buzz" {
+    value = 1
+}
@@ -0,0 +1,7 @@
+variable "bar" {
+    default = "2"
+}
+
+resource "aws_instance" "bizz" {
+    value = 2
+}
@@ -0,0 +1,13 @@
+import terraform_validate
+
+RULES = [
+    terraform_validate.TerraformRule("db encrypted", "aws_db_instance_.*", "storage_encrypted", "should_equal", True),
+]
+
+
+def policy_ebs_encrypted(validator):
+    validator.resources("aws_instance_.*").property("ebs_block_device").property("encrypted").should_equal(True)
+
+
+def policy_value(validator):
+    validator.resources("aws_instance").property("value").should_equal(1)
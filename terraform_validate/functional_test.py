@@ -1,3 +1,5 @@
+from __future__ import absolute_import
+
 import re
 import os
 import sys
@@ -8,6 +10,12 @@ else:
     import unittest
 
 import terraform_validate as t
+import terraform_validate.cli as cli
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 class TestValidatorFunctional(unittest.TestCase):
     def setUp(self):
@@ -247,6 +255,30 @@ class TestValidatorFunctional(unittest.TestCase):
     def test_invalid_terraform_syntax(self):
         self.assertRaises(t.TerraformSyntaxException, t.Validator,os.path.join(self.path, "fixtures/invalid_syntax"))
 
+    def test_invalid_terraform_syntax_names_file(self):
+        expected_error = "^Invalid terraform configuration in {0}".format(re.escape(os.path.join(self.path, "fixtures/invalid_syntax", "1.tf")))
+        with self.assertRaisesRegexp(t.TerraformSyntaxException, expected_error):
+            t.Validator(os.path.join(self.path, "fixtures/invalid_syntax"))
+
+    def test_multiple_files(self):
+        validator = t.Validator(os.path.join(self.path, "fixtures/multiple_files"))
+        validator.resources(['aws_instance','aws_elb']).property('value').should_match_regex('[12]')
+        expected_error = self.error_list_format("[aws_instance.bizz.value] should be '1'. Is: '2'")
+        with self.assertRaisesRegexp(AssertionError, expected_error):
+            validator.resources('aws_instance').property('value').should_equal(1)
+        validator.variable('foo').default_value_equals('1')
+        validator.variable('bar').default_value_equals('2')
+
+    def test_multiple_files_with_workers(self):
+        path = os.path.join(self.path, "fixtures/multiple_files")
+        validator = t.Validator(path, workers=2)
+        self.assertEqual(validator.terraform_config, t.Validator(path).terraform_config)
+
+    def test_invalid_terraform_syntax_with_workers(self):
+        expected_error = "^Invalid terraform configuration in {0}".format(re.escape(os.path.join(self.path, "fixtures/invalid_syntax_multiple_files", "2.tf")))
+        with self.assertRaisesRegexp(t.TerraformSyntaxException, expected_error):
+            t.Validator(os.path.join(self.path, "fixtures/invalid_syntax_multiple_files"), workers=2)
+
     def test_multiple_variable_substitutions(self):
         validator = t.Validator(os.path.join(self.path, "fixtures/multiple_variables"))
         validator.enable_variable_expansion()
@@ -411,4 +443,137 @@ class TestValidatorFunctional(unittest.TestCase):
         tagged_buckets = validator.resources("aws_s3_bucket").with_property("tags", ".*'CustomTag':.*'CustomValue'.*")
 
         with self.assertRaisesRegexp(AssertionError, expected_error):
-            tagged_buckets.property("policy").should_contain_valid_json()
\ No newline at end of file
+            tagged_buckets.property("policy").should_contain_valid_json()
+
+    def test_check_all(self):
+        validator = t.Validator(os.path.join(self.path, "fixtures/enforce_encrypted"))
+        rules = [
+            t.TerraformRule("db encrypted", "aws_db_instance_.*", "storage_encrypted", "should_equal", True),
+            t.TerraformRule("ebs encrypted", "aws_instance_.*", "ebs_block_device.encrypted", "should_equal", True),
+            t.TerraformRule("volumes encrypted", ["aws_ebs_volume_valid"], None, "should_have_properties", ["encrypted"]),
+            t.TerraformRule("volume names", "aws_ebs_volume_.*", None, "name_should_match_regex", "bar[12]"),
+        ]
+        results = validator.check_all(rules)
+        self.assertEqual([result.rule for result in results], rules)
+        self.assertEqual(results[0].errors, ["[aws_db_instance_invalid.foo2.storage_encrypted] should be 'True'. Is: 'False'"])
+        self.assertEqual(results[1].errors, ["[aws_instance_invalid.bizz2.ebs_block_device.encrypted] should be 'True'. Is: 'False'"])
+        self.assertTrue(results[2].passed)
+        self.assertEqual(results[3].errors, ["[aws_ebs_volume_invalid2.bar3] name should match regex 'bar[12]'"])
+
+    def test_check_all_with_missing_properties(self):
+        validator = t.Validator(os.path.join(self.path, "fixtures/enforce_encrypted"))
+        validator.error_if_property_missing()
+        rules = [
+            t.TerraformRule("ebs encrypted", "aws_instance_invalid2", ["ebs_block_device", "encrypted"], "should_equal", True),
+            t.TerraformRule("db encrypted", "aws_db_instance_invalid2", "storage_encrypted", "should_equal", True),
+        ]
+        results = validator.check_all(rules)
+        self.assertEqual(results[0].errors, ["[aws_instance_invalid2.bizz3.ebs_block_device] should have property: 'encrypted'"])
+        self.assertEqual(results[1].errors, ["[aws_db_instance_invalid2.foo3] should have property: 'storage_encrypted'"])
+
+    def test_collect_violations(self):
+        validator = t.Validator(os.path.join(self.path, "fixtures/enforce_encrypted"))
+        validator.error_if_property_missing()
+        collector = validator.collect_violations()
+
+        validator.resources("aws_db_instance_.*").property("storage_encrypted").should_equal(True)
+        validator.resources("aws_instance_.*").property("ebs_block_device").property("encrypted").should_equal(True)
+
+        other_validator = t.Validator(os.path.join(self.path, "fixtures/default_variable"))
+        other_validator.collect_violations(collector)
+        other_validator.variable('bar').default_value_exists()
+
+        self.assertEqual(collector.messages(), [
+            "Variable 'bar' should have a default value",
+            "[aws_db_instance_invalid.foo2.storage_encrypted] should be 'True'. Is: 'False'",
+            "[aws_db_instance_invalid2.foo3] should have property: 'storage_encrypted'",
+            "[aws_instance_invalid.bizz2.ebs_block_device.encrypted] should be 'True'. Is: 'False'",
+            "[aws_instance_invalid2.bizz3.ebs_block_device] should have property: 'encrypted'",
+        ])
+        violation = [v for v in collector.violations if v.resource_name == "bizz2"][0]
+        self.assertEqual((violation.resource_type, violation.property_path, violation.expected, violation.actual),
+                         ("aws_instance_invalid", "ebs_block_device.encrypted", "True", "False"))
+
+        expected_error = self.error_list_format(collector.messages())
+        with self.assertRaisesRegexp(AssertionError, expected_error):
+            collector.raise_errors()
+
+        validator.stop_collecting_violations()
+        with self.assertRaises(AssertionError):
+            validator.resources("aws_db_instance_.*").property("storage_encrypted").should_equal(True)
+
+    def run_cli(self, argv):
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            exit_code = cli.main(argv)
+            return exit_code, sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+    def test_cli(self):
+        policy = os.path.join(self.path, "fixtures/policy/policy.py")
+        encrypted = os.path.join(self.path, "fixtures/enforce_encrypted")
+        resource = os.path.join(self.path, "fixtures/resource")
+
+        exit_code, output = self.run_cli([policy, resource, "--workers", "1"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(output, "0 of 1 terraform directories failed\n")
+
+        for workers in ["1", "2"]:
+            exit_code, output = self.run_cli([policy, encrypted, resource, "--workers", workers])
+            self.assertEqual(exit_code, 1)
+            self.assertEqual(output.split("\n"), [
+                "{0}: [aws_db_instance_invalid.foo2.storage_encrypted] should be 'True'. Is: 'False'".format(encrypted),
+                "{0}: [aws_instance_invalid.bizz2.ebs_block_device.encrypted] should be 'True'. Is: 'False'".format(encrypted),
+                "1 of 2 terraform directories failed",
+                ""
+            ])
+
+    def test_cli_stream(self):
+        policy = os.path.join(self.path, "fixtures/policy/policy.py")
+        encrypted = os.path.join(self.path, "fixtures/enforce_encrypted")
+        exit_code, output = self.run_cli([policy, encrypted, "--workers", "1", "--stream"])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(output, self.run_cli([policy, encrypted, "--workers", "1"])[1])
+
+    def test_cli_stream_parses_each_file_once(self):
+        policy = os.path.join(self.path, "fixtures/policy/policy.py")
+        encrypted = os.path.join(self.path, "fixtures/enforce_encrypted")
+        parse_terraform_file = t.Validator.parse_terraform_file
+        parsed = []
+
+        def counting_parse(validator, file_name):
+            parsed.append(file_name)
+            return parse_terraform_file(validator, file_name)
+
+        t.Validator.parse_terraform_file = counting_parse
+        try:
+            cli.validate_root((policy, encrypted, None, True))
+        finally:
+            t.Validator.parse_terraform_file = parse_terraform_file
+        self.assertEqual(sorted(parsed), sorted(t.Validator().list_terraform_files(encrypted)))
+
+    def test_cli_watch(self):
+        policy = os.path.join(self.path, "fixtures/policy/policy.py")
+        encrypted = os.path.join(self.path, "fixtures/enforce_encrypted")
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            exit_code = cli.watch(policy, [encrypted], 0, None, iterations=2)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(output.split("\n"), [
+            "{0}: [aws_db_instance_invalid.foo2.storage_encrypted] should be 'True'. Is: 'False'".format(encrypted),
+            "{0}: [aws_instance_invalid.bizz2.ebs_block_device.encrypted] should be 'True'. Is: 'False'".format(encrypted),
+            "{0}: 2 errors".format(encrypted),
+            ""
+        ])
+
+    def test_cli_invalid_terraform_syntax(self):
+        policy = os.path.join(self.path, "fixtures/policy/policy.py")
+        exit_code, output = self.run_cli([policy, os.path.join(self.path, "fixtures/invalid_syntax"), "--workers", "1"])
+        self.assertEqual(exit_code, 1)
+        self.assertIn("TerraformSyntaxException: Invalid terraform configuration in", output)
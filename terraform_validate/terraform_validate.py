@@ -3,6 +3,30 @@ import os
 import re
 import warnings
 import json
+import hashlib
+import tempfile
+import multiprocessing
+import collections
+import copy
+import time
+import threading
+import heapq
+import functools
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
 
 # def deprecated(func):
 #     '''This is a decorator which can be used to mark functions
@@ -26,236 +50,789 @@ class TerraformVariableException(Exception):
 class TerraformUnimplementedInterpolationException(Exception):
     pass
 
+class TerraformRuleException(Exception):
+    pass
+
+class TerraformModuleException(Exception):
+    pass
+
 class TerraformVariableParser:
 
+    token_regex = re.compile(r'''\s*(?:(?P<string>"(?:[^"\\]|\\.)*")|(?P<number>-?[0-9]+(?:\.[0-9]+)?)|(?P<name>[A-Za-z_][A-Za-z0-9_\-]*(?:\.(?:[A-Za-z0-9_\-]+|\*)|\[[^\]]*\])*)|(?P<punctuation>[(),]))''')
+
+    # Parsed expressions are shared by every parser, keyed by the expression string.
+    # The least recently used expression is dropped once there are cache_size of them
+    cache = collections.OrderedDict()
+    cache_size = 1024
+
     def __init__(self,string):
         self.string = string
         self.functions = []
         self.variable = ""
-        self.state = 0
-        self.index = 0
+        self.ast = None
+
+    @classmethod
+    def clear_cache(cls):
+        cls.cache.clear()
 
     def parse(self):
-        while self.index < len(self.string):
-            if self.state == 0:
-                if self.string[self.index:self.index+3] == "var":
-                    self.index += 3
-                    self.state = 1
-                else:
-                    self.state = 3
-                    temp_function = ""
-            if self.state == 1:
-                temp_var = ""
+        parsed = self.cache.pop(self.string, None)
+        if parsed is None:
+            tokens = self.tokenize()
+            try:
+                ast, index = self.parse_expression(tokens, 0)
+            except (IndexError, ValueError):
+                ast, index = None, -1
+            if index != len(tokens):
+                raise TerraformUnimplementedInterpolationException("The interpolation '{0}' could not be parsed by Terraform Validator. Suggest you run disable_variable_expansion().".format(self.string))
+            functions, variable = self.find_variable(ast)
+            parsed = (ast, functions, variable)
+            while len(self.cache) >= self.cache_size:
+                self.cache.popitem(last=False)
+        self.cache[self.string] = parsed
+
+        self.ast, functions, self.variable = parsed
+        self.functions = list(functions)
+
+    def tokenize(self):
+        tokens = []
+        index = 0
+        end = len(self.string.rstrip())
+        while index < end:
+            match = self.token_regex.match(self.string, index)
+            if match is None:
+                raise TerraformUnimplementedInterpolationException("The interpolation '{0}' could not be parsed by Terraform Validator. Suggest you run disable_variable_expansion().".format(self.string))
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            index = match.end()
+        return tokens
+
+    def parse_expression(self, tokens, index):
+        # Returns the syntax tree of the expression starting at tokens[index], and the index of the token after it
+        kind, value = tokens[index]
+        if kind == "name" and index + 1 < len(tokens) and tokens[index + 1] == ("punctuation", "("):
+            arguments = []
+            index += 2
+            if tokens[index] != ("punctuation", ")"):
                 while True:
-                    self.index += 1
-                    if self.index == len(self.string) or self.string[self.index] == ")":
-                        self.variable = temp_var
-                        self.state = 2
-                        break;
-                    else:
-                        temp_var += self.string[self.index]
-            if self.state == 2:
-                self.index += 1
-            if self.state == 3:
-                if self.string[self.index] == "(":
-                    self.state = 0
-                    self.functions.append(temp_function)
-                else:
-                    temp_function += self.string[self.index]
-                self.index += 1
+                    argument, index = self.parse_expression(tokens, index)
+                    arguments.append(argument)
+                    if tokens[index] != ("punctuation", ","):
+                        break
+                    index += 1
+            if tokens[index] != ("punctuation", ")"):
+                raise ValueError("Expected ')'")
+            return ("call", value, arguments), index + 1
+        if kind == "name":
+            if value.startswith("var."):
+                return ("variable", value[4:]), index + 1
+            return ("reference", value), index + 1
+        if kind == "string":
+            return ("literal", json.loads(value)), index + 1
+        if kind == "number":
+            return ("literal", json.loads(value)), index + 1
+        raise ValueError("Unexpected '{0}'".format(value))
+
+    def find_variable(self, ast):
+        # Returns the functions wrapped around the first variable in the expression, outermost first, and its name
+        if ast[0] == "variable":
+            return [], ast[1]
+        if ast[0] == "call":
+            for argument in ast[2]:
+                functions, variable = self.find_variable(argument)
+                if variable != "":
+                    return [ast[1]] + functions, variable
+        return [], ""
+
+# time.perf_counter() is not available on Python 2
+timer = getattr(time, 'perf_counter', time.time)
+
+class TerraformParserBackend(object):
+
+    # Turns the content of a file into the same dict that hcl.loads() outputs, and raises ValueError on invalid syntax
+    name = None
+    extensions = ('.tf',)
+
+    def available(self):
+        return True
+
+    def handles(self, file_name):
+        return file_name.endswith(self.extensions)
+
+    def parse(self, string):
+        raise NotImplementedError()
+
+class TerraformJsonBackend(TerraformParserBackend):
+
+    name = 'json'
+    extensions = ('.tf.json',)
+
+    def parse(self, string):
+        return json.loads(string)
+
+class TerraformPyhclParserBackend(TerraformParserBackend):
+
+    # hcl.loads() builds a new parser for every call. Reusing one parser per thread gives the same results several times faster
+    name = 'pyhcl-parser'
+    parsers = threading.local()
+
+    def available(self):
+        return hasattr(hcl, 'parser') and hasattr(hcl.parser, 'HclParser') and hasattr(hcl, 'api') and hasattr(hcl.api, 'isHcl')
+
+    def parse(self, string):
+        string = hcl.api.u(string)
+        if not hcl.api.isHcl(string):
+            return json.loads(string)
+        parser = getattr(self.parsers, 'parser', None)
+        if parser is None:
+            parser = self.parsers.parser = hcl.parser.HclParser()
+        return parser.parse(string)
+
+class TerraformPyhclBackend(TerraformParserBackend):
+
+    name = 'pyhcl'
+    extensions = ('.tf', '.tf.json')
+
+    def parse(self, string):
+        return hcl.loads(string)
+
+# Each worker process keeps one Validator, so its parse cache keeps track of the cache size between files
+_worker_validator = None
+
+def _init_parse_worker(cache_dir, cache_size, parser_backend):
+    global _worker_validator
+    _worker_validator = Validator(cache_dir=cache_dir, cache_size=cache_size, parser_backend=parser_backend)
+
+def _parse_terraform_file(file_name):
+    # Runs in a worker process, so it has to be a module level function
+    parse_cache = _worker_validator.parse_cache
+    if parse_cache is None:
+        hits, misses = 0, 0
+    else:
+        hits, misses = parse_cache.hits, parse_cache.misses
+    start = timer()
+    terraform = _worker_validator.parse_terraform_file(file_name)
+    duration = timer() - start
+    if parse_cache is None:
+        return terraform, 0, 0, duration
+    return terraform, parse_cache.hits - hits, parse_cache.misses - misses, duration
+
+class TerraformParseCache:
+
+    FORMAT_VERSION = 1
+    # Eviction goes down to this fraction of max_size, so that the next writes do not each scan the directory again
+    LOW_WATER_MARK = 0.8
+
+    def __init__(self, path, max_size=64 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.total_size = None
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def entry_path(self, file_name, backend_name=None):
+        # Backends can give different results for the same file, so each one has its own entries
+        key = hashlib.sha1("{0}:{1}".format(backend_name, os.path.abspath(file_name)).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key + ".cache")
+
+    def content_hash(self, content):
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+        return hashlib.sha1(content).hexdigest()
+
+    def load(self, file_name, parse, backend_name=None):
+        stat = os.stat(file_name)
+        entry_path = self.entry_path(file_name, backend_name)
+        entry = self.read_entry(entry_path)
+
+        if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            self.hits += 1
+            self.touch(entry_path)
+            return entry['terraform']
+
+        with open(file_name) as fp:
+            content = fp.read()
+        digest = self.content_hash(content)
+
+        if entry is not None and entry['hash'] == digest:
+            self.hits += 1
+            terraform = entry['terraform']
+        else:
+            self.misses += 1
+            terraform = parse(file_name, content)
+
+        self.write_entry(entry_path, {'version': self.FORMAT_VERSION,
+                                      'hcl_version': getattr(hcl, '__version__', None),
+                                      'mtime': stat.st_mtime,
+                                      'size': stat.st_size,
+                                      'hash': digest,
+                                      'terraform': terraform})
+        return terraform
+
+    def read_entry(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as fp:
+                entry = pickle.load(fp)
+        except Exception:
+            return None
+        if entry.get('version') != self.FORMAT_VERSION or entry.get('hcl_version') != getattr(hcl, '__version__', None):
+            return None
+        return entry
+
+    def write_entry(self, entry_path, entry):
+        previous_size = self.entry_size(entry_path)
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump(entry, fp, pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(entry_path):
+                os.remove(entry_path)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        if self.total_size is None:
+            self.total_size = self.cache_size()
+        else:
+            self.total_size += self.entry_size(entry_path) - previous_size
+        if self.total_size > self.max_size:
+            self.evict()
+
+    def entry_size(self, entry_path):
+        try:
+            return os.path.getsize(entry_path)
+        except OSError:
+            return 0
+
+    def touch(self, entry_path):
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+    def entries(self):
+        entries = []
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(".cache"):
+                entry_path = os.path.join(self.path, file_name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def cache_size(self):
+        return sum(size for mtime, size, entry_path in self.entries())
+
+    def evict(self):
+        # Least recently used entries are removed first, hits refresh an entry's mtime
+        entries = sorted(self.entries())
+        self.total_size = sum(size for mtime, size, entry_path in entries)
+        for mtime, size, entry_path in entries:
+            if self.total_size <= self.max_size * self.LOW_WATER_MARK:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # Another process may have removed it already, which frees the space all the same
+                if os.path.exists(entry_path):
+                    continue
+            self.total_size -= size
+
+    def clear(self):
+        for mtime, size, entry_path in self.entries():
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+        self.total_size = 0
+
+class TerraformRegexCache:
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.patterns = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, regex, dotall=False):
+        key = (regex, dotall)
+        pattern = self.patterns.pop(key, None)
+        if pattern is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            anchored_regex = regex
+            if anchored_regex[-1:] != "$":
+                anchored_regex = anchored_regex + "$"
+            if anchored_regex[0] != "^":
+                anchored_regex = "^" + anchored_regex
+            if dotall:
+                pattern = re.compile(anchored_regex, re.DOTALL)
+            else:
+                pattern = re.compile(anchored_regex)
+            if len(self.patterns) >= self.max_size:
+                self.patterns.popitem(last=False)
+        self.patterns[key] = pattern
+        return pattern
+
+    def clear(self):
+        self.patterns.clear()
+        self.hits = 0
+        self.misses = 0
+
+class TerraformProfileEvent(object):
 
-class TerraformPropertyList:
+    __slots__ = ('phase', 'name', 'duration', 'count')
 
-    def __init__(self, validator):
-        self.properties = []
+    def __init__(self, phase, name, duration, count=None):
+        self.phase = phase
+        self.name = name
+        self.duration = duration
+        self.count = count
+
+class TerraformProfiler(object):
+
+    def __init__(self, callback=None):
+        # callback is called with every TerraformProfileEvent as it is recorded
+        self.callback = callback
+        self.events = []
+
+    def record(self, phase, name, duration, count=None):
+        event = TerraformProfileEvent(phase, name, duration, count)
+        self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    def summary(self):
+        # Totals per phase and name, as {(phase, name): [calls, duration, count]}
+        totals = collections.OrderedDict()
+        for event in self.events:
+            total = totals.setdefault((event.phase, event.name), [0, 0.0, 0])
+            total[0] += 1
+            total[1] += event.duration
+            if event.count is not None:
+                total[2] += event.count
+        return totals
+
+    def report(self, limit=None):
+        totals = sorted(self.summary().items(), key=lambda item: item[1][1], reverse=True)
+        if limit is not None:
+            totals = totals[:limit]
+        lines = ["{0:<14} {1:>8} {2:>12} {3:>10}  {4}".format("phase", "calls", "seconds", "count", "name")]
+        for (phase, name), (calls, duration, count) in totals:
+            lines.append("{0:<14} {1:>8} {2:>12.6f} {3:>10}  {4}".format(phase, calls, duration, count, name))
+        return "\n".join(lines)
+
+    def clear(self):
+        self.events = []
+
+class TerraformStringList(object):
+
+    # Prints a list as a list of str, the same on Python 2 and 3, but only when the message is formatted
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    @classmethod
+    def wrap(cls, value):
+        if type(value) is list:
+            return cls(value)
+        return value
+
+    def __str__(self):
+        return str([str(x) for x in self.values])
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+class TerraformViolation(object):
+
+    __slots__ = ('resource_type', 'resource_name', 'property_path', 'expected', 'actual', 'template', 'arguments', 'module_path', '_message')
+
+    def __init__(self, resource_type, resource_name, property_path, expected, actual, message, *arguments):
+        # When arguments are given, message is a template that is only formatted when the message is needed
+        self.resource_type = resource_type
+        self.resource_name = resource_name
+        self.property_path = property_path
+        self.expected = expected
+        self.actual = actual
+        self.template = message
+        self.arguments = arguments
+        # Set by the Validator of a module, eg. ("network", "subnets")
+        self.module_path = ()
+        self._message = None
+
+    @property
+    def message(self):
+        if self._message is None:
+            message = self.template.format(*self.arguments) if len(self.arguments) > 0 else self.template
+            if len(self.module_path) > 0:
+                message = "{0}: {1}".format(self.module_address(), message)
+            self._message = message
+        return self._message
+
+    def module_address(self):
+        return ".".join("module.{0}".format(name) for name in self.module_path)
+
+    @classmethod
+    def for_property(cls, property, expected, actual, message, *arguments):
+        return cls.for_property_name(property.resource_type, property.resource_name, property.property_name, expected, actual, message, *arguments)
+
+    @classmethod
+    def for_property_name(cls, resource_type, resource_name, property_name, expected, actual, message, *arguments):
+        # Nested properties carry their parent properties in resource_name, eg. "foo.ebs_block_device"
+        names = resource_name.split(".", 1)
+        if len(names) == 1:
+            property_path = property_name
+        else:
+            property_path = "{0}.{1}".format(names[1], property_name)
+        return cls(resource_type, names[0], property_path, expected, actual, message, *arguments)
+
+    @classmethod
+    def join_messages(cls, violations, max_messages=None):
+        # With max_messages, only that many messages are formatted, picked in resource order rather than message order
+        if max_messages is None or len(violations) <= max_messages:
+            return "\n".join(sorted(violation.message for violation in violations))
+        first = heapq.nsmallest(max_messages, violations, key=cls.sort_key)
+        messages = sorted(violation.message for violation in first)
+        messages.append("... {0} more errors, {1} in total".format(len(violations) - max_messages, len(violations)))
+        return "\n".join(messages)
+
+    def sort_key(self):
+        return (self.resource_type, self.resource_name, self.property_path or "")
+
+    def __str__(self):
+        return self.message
+
+class TerraformViolationCollector(object):
+
+    def __init__(self):
+        self.violations = []
+
+    def __len__(self):
+        return len(self.violations)
+
+    def add(self, violations):
+        self.violations.extend(violations)
+
+    def messages(self):
+        return sorted(violation.message for violation in self.violations)
+
+    def raise_errors(self, max_messages=None):
+        if len(self.violations) > 0:
+            raise AssertionError(TerraformViolation.join_messages(self.violations, max_messages))
+
+    def clear(self):
+        self.violations = []
+
+class TerraformPropertyList(object):
+
+    # Validation functions that can be named by a TerraformRule, each has a matching *_errors method
+    rule_checks = frozenset(['should_equal', 'should_not_equal', 'should_be_one_of', 'should_not_be_one_of',
+                             'list_should_contain', 'list_should_not_contain', 'should_have_properties',
+                             'should_not_have_properties', 'should_match_regex', 'should_contain_valid_json'])
+
+    def __init__(self, validator, source=None):
+        # In lazy evaluation mode, source returns an iterator and the properties are only built when they are needed
+        self.source = source
+        self._properties = []
         self.validator = validator
+        # Set when the properties came from the validator's property index
+        self.resource_types = None
+        self.property_path = None
+
+    @property
+    def properties(self):
+        if self.source is not None:
+            self._properties = list(self.source())
+            self.source = None
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties):
+        self.source = None
+        self._properties = properties
+
+    def iter_properties(self):
+        if self.source is not None:
+            return self.source()
+        return iter(self._properties)
 
     def tfproperties(self):
         return self.properties
 
     def property(self, property_name):
-        errors = []
+        collect_missing = self.validator.raise_error_if_property_missing
+        if self.validator.lazy_evaluation:
+            return TerraformPropertyList(self.validator, lambda: self.iter_checked_properties(property_name, collect_missing))
+
+        if self.property_path is not None and self.validator.use_property_index:
+            return self.validator.get_indexed_properties(self.resource_types, self.property_path + (property_name,))
+
         result = TerraformPropertyList(self.validator)
-        for property in self.properties:
-            def _check_prop(prop_value):
-                if property_name in prop_value.keys():
-                    result.properties.append(TerraformProperty(property.resource_type,
-                                                         "{0}.{1}".format(property.resource_name,property.property_name),
-                                                         property_name,
-                                                         prop_value[property_name]))
-                elif self.validator.raise_error_if_property_missing:
-                    errors.append("[{0}.{1}] should have property: '{2}'".format(property.resource_type, "{0}.{1}".format(property.resource_name,property.property_name), property_name))
+        profiler = self.validator.profiler
+        if profiler is not None:
+            start = timer()
+        result.properties, missing = self.collect_properties(property_name, collect_missing)
+        if profiler is not None:
+            profiler.record("property", property_name, timer() - start, len(result.properties))
+        self.validator.raise_missing_properties(missing)
+
+        return result
 
+    def collect_properties(self, property_name, collect_missing):
+        missing = []
+        properties = list(self.iter_collected_properties(property_name, collect_missing, missing))
+        return properties, missing
+
+    def iter_checked_properties(self, property_name, collect_missing):
+        # Used in lazy evaluation mode, missing properties are reported once every property has been seen
+        missing = []
+        for property in self.iter_collected_properties(property_name, collect_missing, missing):
+            yield property
+        self.validator.raise_missing_properties(missing)
+
+    def iter_collected_properties(self, property_name, collect_missing, missing):
+        for property in self.iter_properties():
+            resource_name = "{0}.{1}".format(property.resource_name,property.property_name)
             if isinstance(property.property_value, list):
-                for prop in property.property_value:
-                    _check_prop(prop)
+                prop_values = property.property_value
             else:
-                _check_prop(property.property_value)
-
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+                prop_values = [property.property_value]
 
-        return result
+            for prop_value in prop_values:
+                if property_name in prop_value.keys():
+                    yield TerraformProperty(property.resource_type,
+                                            resource_name,
+                                            property_name,
+                                            prop_value[property_name])
+                elif collect_missing:
+                    missing.append((property.resource_type, resource_name, property_name))
+
+    def collect_errors(self, check, *args):
+        errors = []
+        profiler = self.validator.profiler
+        if profiler is not None:
+            start = timer()
+        count = 0
+        for property in self.iter_properties():
+            errors.extend(check(property, *args))
+            count += 1
+        if profiler is not None:
+            profiler.record("assertion", check.__name__[:-len("_errors")], timer() - start, count)
+        return errors
 
     def should_equal(self,expected_value):
-        errors = []
-        for property in self.properties:
+        self.validator.raise_errors(self.collect_errors(self.should_equal_errors, expected_value))
 
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+    def should_equal_errors(self, property, expected_value):
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
 
-            expected_value = self.int2str(expected_value)
-            actual_property_value = self.int2str(actual_property_value)
-            expected_value = self.bool2str(expected_value)
-            actual_property_value = self.bool2str(actual_property_value)
+        expected_value = self.int2str(expected_value)
+        actual_property_value = self.int2str(actual_property_value)
+        expected_value = self.bool2str(expected_value)
+        actual_property_value = self.bool2str(actual_property_value)
 
-            if actual_property_value != expected_value:
-                errors.append("[{0}.{1}.{2}] should be '{3}'. Is: '{4}'".format(property.resource_type,
-                                                                        property.resource_name,
-                                                                        property.property_name,
-                                                                        expected_value,
-                                                                        actual_property_value))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        if actual_property_value != expected_value:
+            return [TerraformViolation.for_property(property, expected_value, actual_property_value,
+                                                    "[{0}.{1}.{2}] should be '{3}'. Is: '{4}'", property.resource_type,
+                                                                                                property.resource_name,
+                                                                                                property.property_name,
+                                                                                                expected_value,
+                                                                                                actual_property_value)]
+        return []
 
     def should_not_equal(self,expected_value):
-        errors = []
-        for property in self.properties:
+        self.validator.raise_errors(self.collect_errors(self.should_not_equal_errors, expected_value))
+
+    def should_not_equal_errors(self, property, expected_value):
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+
+        actual_property_value = self.int2str(actual_property_value)
+        expected_value = self.int2str(expected_value)
+        expected_value = self.bool2str(expected_value)
+        actual_property_value = self.bool2str(actual_property_value)
+
+        if actual_property_value == expected_value:
+            return [TerraformViolation.for_property(property, expected_value, actual_property_value,
+                                                    "[{0}.{1}.{2}] should not be '{3}'. Is: '{4}'", property.resource_type,
+                                                                                                    property.resource_name,
+                                                                                                    property.property_name,
+                                                                                                    expected_value,
+                                                                                                    actual_property_value)]
+        return []
+
+    def should_be_one_of(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
+
+        self.validator.raise_errors(self.collect_errors(self.should_be_one_of_errors, values_list))
 
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+    def should_be_one_of_errors(self, property, values_list):
+        actual_property_value = self.normalise_value(self.validator.substitute_variable_values_in_string(property.property_value))
+        values_list = [self.normalise_value(value) for value in values_list]
+
+        if actual_property_value not in values_list:
+            return [TerraformViolation.for_property(property, values_list, actual_property_value,
+                                                    "[{0}.{1}.{2}] should be one of '{3}'. Is: '{4}'", property.resource_type,
+                                                                                                       property.resource_name,
+                                                                                                       property.property_name,
+                                                                                                       values_list,
+                                                                                                       actual_property_value)]
+        return []
+
+    def should_not_be_one_of(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
 
-            actual_property_value = self.int2str(actual_property_value)
-            expected_value = self.int2str(expected_value)
-            expected_value = self.bool2str(expected_value)
-            actual_property_value = self.bool2str(actual_property_value)
+        self.validator.raise_errors(self.collect_errors(self.should_not_be_one_of_errors, values_list))
 
-            if actual_property_value == expected_value:
-                errors.append("[{0}.{1}.{2}] should not be '{3}'. Is: '{4}'".format(property.resource_type,
-                                                                        property.resource_name,
-                                                                        property.property_name,
-                                                                        expected_value,
-                                                                        actual_property_value))
+    def should_not_be_one_of_errors(self, property, values_list):
+        actual_property_value = self.normalise_value(self.validator.substitute_variable_values_in_string(property.property_value))
+        values_list = [self.normalise_value(value) for value in values_list]
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        if actual_property_value in values_list:
+            return [TerraformViolation.for_property(property, values_list, actual_property_value,
+                                                    "[{0}.{1}.{2}] should not be one of '{3}'. Is: '{4}'", property.resource_type,
+                                                                                                           property.resource_name,
+                                                                                                           property.property_name,
+                                                                                                           values_list,
+                                                                                                           actual_property_value)]
+        return []
 
     def list_should_contain(self,values_list):
-        errors = []
+        if type(values_list) is not  list:
+            values_list = [values_list]
 
+        self.validator.raise_errors(self.collect_errors(self.list_should_contain_errors, values_list))
+
+    def list_should_contain_errors(self, property, values_list):
         if type(values_list) is not  list:
             values_list = [values_list]
 
-        for property in self.properties:
-
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
-            values_missing = []
-            for value in values_list:
-                if value not in actual_property_value :
-                    values_missing.append(value)
-
-            if len(values_missing) != 0:
-                if type(actual_property_value) is list:
-                    actual_property_value = [str(x) for x in actual_property_value] # fix 2.6/7
-                errors.append("[{0}.{1}.{2}] '{3}' should contain '{4}'.".format(property.resource_type,
-                                                                        property.resource_name,
-                                                                        property.property_name,
-                                                                        actual_property_value,
-                                                                        values_missing))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+        lookup = self.membership_lookup(actual_property_value)
+        values_missing = [value for value in values_list if not self.contains(lookup, actual_property_value, value)]
 
-    def list_should_not_contain(self,values_list):
-        errors = []
+        if len(values_missing) != 0:
+            return [TerraformViolation.for_property(property, values_missing, actual_property_value,
+                                                    "[{0}.{1}.{2}] '{3}' should contain '{4}'.", property.resource_type,
+                                                                                                 property.resource_name,
+                                                                                                 property.property_name,
+                                                                                                 TerraformStringList.wrap(actual_property_value),
+                                                                                                 values_missing)]
+        return []
 
+    def list_should_not_contain(self,values_list):
         if type(values_list) is not  list:
             values_list = [values_list]
 
-        for property in self.properties:
+        self.validator.raise_errors(self.collect_errors(self.list_should_not_contain_errors, values_list))
 
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
-            values_missing = []
-            for value in values_list:
-                if value in actual_property_value :
-                    values_missing.append(value)
+    def list_should_not_contain_errors(self, property, values_list):
+        if type(values_list) is not  list:
+            values_list = [values_list]
 
-            if len(values_missing) != 0:
-                if type(actual_property_value) is list:
-                    actual_property_value = [str(x) for x in actual_property_value] # fix 2.6/7
-                errors.append("[{0}.{1}.{2}] '{3}' should not contain '{4}'.".format(property.resource_type,
-                                                                        property.resource_name,
-                                                                        property.property_name,
-                                                                        actual_property_value,
-                                                                        values_missing))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+        lookup = self.membership_lookup(actual_property_value)
+        values_missing = [value for value in values_list if self.contains(lookup, actual_property_value, value)]
 
+        if len(values_missing) != 0:
+            return [TerraformViolation.for_property(property, values_missing, actual_property_value,
+                                                    "[{0}.{1}.{2}] '{3}' should not contain '{4}'.", property.resource_type,
+                                                                                                     property.resource_name,
+                                                                                                     property.property_name,
+                                                                                                     TerraformStringList.wrap(actual_property_value),
+                                                                                                     values_missing)]
+        return []
 
     def should_have_properties(self, properties_list):
-        errors = []
+        if type(properties_list) is not list:
+            properties_list = [properties_list]
+
+        self.validator.raise_errors(self.collect_errors(self.should_have_properties_errors, properties_list))
 
+    def should_have_properties_errors(self, property, properties_list):
         if type(properties_list) is not list:
             properties_list = [properties_list]
 
-        for property in self.properties:
-            property_names = property.property_value.keys()
-            for required_property_name in properties_list:
-                if required_property_name not in property_names:
-                    errors.append("[{0}.{1}.{2}] should have property: '{3}'".format(property.resource_type,
-                                                                                     property.resource_name,
-                                                                                     property.property_name,
-                                                                                    required_property_name))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        errors = []
+        # Property names are looked up in the map itself, which is O(1) on Python 2 as well
+        property_names = self.property_names(property.property_value)
+        for required_property_name in properties_list:
+            if required_property_name not in property_names:
+                errors.append(TerraformViolation.for_property(property, required_property_name, None,
+                                                              "[{0}.{1}.{2}] should have property: '{3}'", property.resource_type,
+                                                                                                           property.resource_name,
+                                                                                                           property.property_name,
+                                                                                                           required_property_name))
+        return errors
 
     def should_not_have_properties(self, properties_list):
-        errors = []
+        if type(properties_list) is not list:
+            properties_list = [properties_list]
 
+        self.validator.raise_errors(self.collect_errors(self.should_not_have_properties_errors, properties_list))
+
+    def should_not_have_properties_errors(self, property, properties_list):
         if type(properties_list) is not list:
             properties_list = [properties_list]
 
-        for property in self.properties:
-            property_names = property.property_value.keys()
-            for excluded_property_name in properties_list:
-                if excluded_property_name in property_names:
-                    errors.append(
-                        "[{0}.{1}.{2}] should not have property: '{3}'".format(property.resource_type,
-                                                                               property.resource_name,
-                                                                               property.property_name,
-                                                                               excluded_property_name))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        errors = []
+        property_names = self.property_names(property.property_value)
+        for excluded_property_name in properties_list:
+            if excluded_property_name in property_names:
+                errors.append(TerraformViolation.for_property(property, None, excluded_property_name,
+                                                              "[{0}.{1}.{2}] should not have property: '{3}'", property.resource_type,
+                                                                                                               property.resource_name,
+                                                                                                               property.property_name,
+                                                                                                               excluded_property_name))
+        return errors
 
     def find_property(self,regex):
-        list = TerraformPropertyList(self.validator)
-        for property in self.properties:
+        if self.validator.lazy_evaluation:
+            return TerraformPropertyList(self.validator, lambda: self.iter_found_properties(regex))
+
+        result = TerraformPropertyList(self.validator)
+        result.properties = list(self.iter_found_properties(regex))
+        return result
+
+    def iter_found_properties(self,regex):
+        for property in self.iter_properties():
             for nested_property in property.property_value:
                 if self.validator.matches_regex_pattern(nested_property, regex):
-                    list.properties.append(TerraformProperty(property.resource_type,
-                                                        "{0}.{1}".format(property.resource_name,property.property_name),
-                                                        nested_property,
-                                                        property.property_value[nested_property]))
-        return list
+                    yield TerraformProperty(property.resource_type,
+                                            "{0}.{1}".format(property.resource_name,property.property_name),
+                                            nested_property,
+                                            property.property_value[nested_property])
 
     def should_match_regex(self,regex):
-        errors = []
-        for property in self.properties:
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
-            if not self.validator.matches_regex_pattern(actual_property_value, regex):
-                errors.append("[{0}.{1}] should match regex '{2}'".format(property.resource_type, "{0}.{1}".format(property.resource_name,property.property_name), regex))
+        self.validator.raise_errors(self.collect_errors(self.should_match_regex_errors, regex))
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+    def should_match_regex_errors(self, property, regex):
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+        if not self.validator.matches_regex_pattern(actual_property_value, regex):
+            return [TerraformViolation.for_property(property, regex, actual_property_value,
+                                                    "[{0}.{1}.{2}] should match regex '{3}'", property.resource_type, property.resource_name, property.property_name, regex)]
+        return []
 
     def should_contain_valid_json(self):
-        errors = []
-        for property in self.properties:
-            actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
-            try:
-                json_object = json.loads(actual_property_value)
-            except:
-                errors.append("[{0}.{1}.{2}] is not valid json".format(property.resource_type, property.resource_name, property.property_name))
+        self.validator.raise_errors(self.collect_errors(self.should_contain_valid_json_errors))
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+    def should_contain_valid_json_errors(self, property):
+        actual_property_value = self.validator.substitute_variable_values_in_string(property.property_value)
+        try:
+            json_object = json.loads(actual_property_value)
+        except:
+            return [TerraformViolation.for_property(property, None, actual_property_value,
+                                                    "[{0}.{1}.{2}] is not valid json", property.resource_type, property.resource_name, property.property_name)]
+        return []
 
     def bool2str(self,bool):
         if str(bool).lower() in ["true"]:
@@ -269,7 +846,149 @@ class TerraformPropertyList:
             property_value = str(property_value)
         return property_value
 
-class TerraformProperty:
+    def property_names(self, property_value):
+        if isinstance(property_value, dict):
+            return property_value
+        return property_value.keys()
+
+    def membership_lookup(self, values):
+        # Lists are turned into a set once, so each membership test is O(1). Strings keep substring tests
+        if type(values) is not list:
+            return values
+        try:
+            return set(values)
+        except TypeError:
+            return values
+
+    def contains(self, lookup, values, value):
+        try:
+            return value in lookup
+        except TypeError:
+            # An unhashable value, eg. a map, is compared against the original list
+            return value in values
+
+    def normalise_value(self, property_value):
+        # The same conversions should_equal() makes before comparing values
+        return self.bool2str(self.int2str(property_value))
+
+    def table(self):
+        return TerraformPropertyTable(self.validator, list(self.iter_properties()))
+
+class TerraformPropertyTable(object):
+
+    def __init__(self, validator, properties):
+        # One row per property, in columns. The values are normalised the way should_equal() compares them
+        self.validator = validator
+        self.properties = properties
+        self.checker = TerraformPropertyList(validator)
+        self.resource_types = []
+        self.resource_names = []
+        self.property_paths = []
+        self.values = []
+        for property in properties:
+            # Nested properties carry their parent properties in resource_name, eg. "foo.ebs_block_device"
+            names = property.resource_name.split(".", 1)
+            self.resource_types.append(property.resource_type)
+            self.resource_names.append(names[0])
+            if len(names) == 1:
+                self.property_paths.append(property.property_name)
+            else:
+                self.property_paths.append("{0}.{1}".format(names[1], property.property_name))
+            self.values.append(self.checker.normalise_value(validator.substitute_variable_values_in_string(property.property_value)))
+
+        # Values that are not strings, eg. lists and maps, are compared one at a time
+        self.other_rows = [row for row, value in enumerate(self.values) if not isinstance(value, string_types)]
+        # Each distinct string gets an integer code, so the array stays small however long the strings are
+        self.value_codes = {}
+        self.code_array = None
+        if numpy is not None:
+            codes = [-1] * len(self.values)
+            for row, value in enumerate(self.values):
+                if isinstance(value, string_types):
+                    codes[row] = self.value_codes.setdefault(value, len(self.value_codes))
+            self.code_array = numpy.array(codes, dtype=numpy.int64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def equal_mask(self, expected_value):
+        expected_value = self.checker.normalise_value(expected_value)
+        if self.code_array is None or not isinstance(expected_value, string_types):
+            return [value == expected_value for value in self.values]
+        code = self.value_codes.get(expected_value)
+        if code is None:
+            mask = numpy.zeros(len(self.values), dtype=bool)
+        else:
+            mask = self.code_array == code
+        for row in self.other_rows:
+            mask[row] = self.values[row] == expected_value
+        return mask
+
+    def membership_mask(self, values_list):
+        values_list = [self.checker.normalise_value(value) for value in values_list]
+        strings = [value for value in values_list if isinstance(value, string_types)]
+        if self.code_array is None or len(strings) != len(values_list):
+            return [value in values_list for value in self.values]
+        codes = [self.value_codes[value] for value in strings if value in self.value_codes]
+        mask = numpy.isin(self.code_array, codes)
+        for row in self.other_rows:
+            mask[row] = self.values[row] in values_list
+        return mask
+
+    def rows(self, mask, matching=True):
+        # Outputs the indices of the rows whose mask is matching
+        if isinstance(mask, list):
+            return [row for row, matched in enumerate(mask) if matched == matching]
+        if not matching:
+            mask = ~mask
+        return numpy.flatnonzero(mask).tolist()
+
+    def row_errors(self, rows, check, *args):
+        # Error messages are only built for the failing rows, by the same functions TerraformPropertyList uses
+        errors = []
+        for row in rows:
+            errors.extend(check(self.properties[row], *args))
+        return errors
+
+    def should_equal_rows(self, expected_value):
+        return self.rows(self.equal_mask(expected_value), False)
+
+    def should_not_equal_rows(self, unexpected_value):
+        return self.rows(self.equal_mask(unexpected_value))
+
+    def should_be_one_of_rows(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
+        return self.rows(self.membership_mask(values_list), False)
+
+    def should_not_be_one_of_rows(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
+        return self.rows(self.membership_mask(values_list))
+
+    def should_equal(self, expected_value):
+        rows = self.should_equal_rows(expected_value)
+        self.validator.raise_errors(self.row_errors(rows, self.checker.should_equal_errors, expected_value))
+
+    def should_not_equal(self, unexpected_value):
+        rows = self.should_not_equal_rows(unexpected_value)
+        self.validator.raise_errors(self.row_errors(rows, self.checker.should_not_equal_errors, unexpected_value))
+
+    def should_be_one_of(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
+        rows = self.should_be_one_of_rows(values_list)
+        self.validator.raise_errors(self.row_errors(rows, self.checker.should_be_one_of_errors, values_list))
+
+    def should_not_be_one_of(self, values_list):
+        if type(values_list) is not list:
+            values_list = [values_list]
+        rows = self.should_not_be_one_of_rows(values_list)
+        self.validator.raise_errors(self.row_errors(rows, self.checker.should_not_be_one_of_errors, values_list))
+
+class TerraformProperty(object):
+
+    __slots__ = ('resource_type', 'resource_name', 'property_name', 'property_value')
 
     def __init__(self,resource_type,resource_name,property_name,property_value):
         self.resource_type = resource_type
@@ -280,17 +999,25 @@ class TerraformProperty:
     def get_property_value(self, validator):
         return validator.substitute_variable_values_in_string(self.property_value)
 
-class TerraformResource:
+class TerraformResource(object):
+
+    __slots__ = ('type', 'name', 'config')
 
     def __init__(self,type,name,config):
         self.type = type
         self.name = name
         self.config = config
 
-class TerraformResourceList:
+class TerraformResourceList(object):
 
-    def __init__(self, validator, resource_types, resources):
-        self.resource_list = []
+    # Validation functions that can be named by a TerraformRule, each has a matching *_errors method
+    rule_checks = frozenset(['should_have_properties', 'should_not_have_properties', 'name_should_match_regex'])
+
+    def __init__(self, validator, resource_types, resources, source=None):
+        # resources maps each resource type to a list of TerraformResource, as built by Validator.get_resource_index()
+        # In lazy evaluation mode, source returns an iterator and the resources are only built when they are needed
+        self.source = source
+        self._resource_list = []
         
         if type(resource_types) is not list:
             all_resource_types = list(resources.keys())
@@ -301,101 +1028,168 @@ class TerraformResourceList:
                     resource_types.append(resource_type)
 
         for resource_type in resource_types:
-            if resource_type in resources.keys():
-                for resource in resources[resource_type]:
-                    self.resource_list.append(TerraformResource(resource_type,resource,resources[resource_type][resource]))
+            if resource_type in resources:
+                self._resource_list.extend(resources[resource_type])
 
         self.resource_types = resource_types
         self.validator = validator
+        # Set when resource_list holds every resource of resource_types, so property lookups can use the property index
+        self.indexed = False
+
+    @property
+    def resource_list(self):
+        if self.source is not None:
+            self._resource_list = list(self.source())
+            self.source = None
+        return self._resource_list
+
+    @resource_list.setter
+    def resource_list(self, resource_list):
+        self.source = None
+        self._resource_list = resource_list
+
+    def iter_resources(self):
+        if self.source is not None:
+            return self.source()
+        return iter(self._resource_list)
 
     def property(self, property_name):
-        errors = []
-        list = TerraformPropertyList(self.validator)
-        if len(self.resource_list) > 0:
-            for resource in self.resource_list:
-                if property_name in resource.config.keys():
-                    list.properties.append(TerraformProperty(resource.type,resource.name,property_name,resource.config[property_name]))
-                elif self.validator.raise_error_if_property_missing:
-                    errors.append("[{0}.{1}] should have property: '{2}'".format(resource.type,resource.name,property_name))
+        collect_missing = self.validator.raise_error_if_property_missing
+        if self.validator.lazy_evaluation:
+            return TerraformPropertyList(self.validator, lambda: self.iter_checked_properties(property_name, collect_missing))
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        if self.indexed and self.validator.use_property_index:
+            return self.validator.get_indexed_properties(self.resource_types, (property_name,))
 
-        return list
+        result = TerraformPropertyList(self.validator)
+        profiler = self.validator.profiler
+        if profiler is not None:
+            start = timer()
+        result.properties, missing = self.collect_properties(property_name, collect_missing)
+        if profiler is not None:
+            profiler.record("property", property_name, timer() - start, len(result.properties))
+        self.validator.raise_missing_properties(missing)
+
+        return result
+
+    def collect_properties(self, property_name, collect_missing):
+        missing = []
+        properties = list(self.iter_collected_properties(property_name, collect_missing, missing))
+        return properties, missing
+
+    def iter_checked_properties(self, property_name, collect_missing):
+        # Used in lazy evaluation mode, missing properties are reported once every property has been seen
+        missing = []
+        for property in self.iter_collected_properties(property_name, collect_missing, missing):
+            yield property
+        self.validator.raise_missing_properties(missing)
+
+    def iter_collected_properties(self, property_name, collect_missing, missing):
+        for resource in self.iter_resources():
+            if property_name in resource.config.keys():
+                yield TerraformProperty(resource.type,resource.name,property_name,resource.config[property_name])
+            elif collect_missing:
+                missing.append((resource.type,resource.name,property_name))
 
     def find_property(self, regex):
-        list = TerraformPropertyList(self.validator)
-        if len(self.resource_list) > 0:
-            for resource in self.resource_list:
-                for property in resource.config:
-                    if self.validator.matches_regex_pattern(property, regex):
-                        list.properties.append(TerraformProperty(resource.type,
-                                                             resource.name,
-                                                             property,
-                                                             resource.config[property]))
-        return list
+        if self.validator.lazy_evaluation:
+            return TerraformPropertyList(self.validator, lambda: self.iter_found_properties(regex))
+
+        result = TerraformPropertyList(self.validator)
+        result.properties = list(self.iter_found_properties(regex))
+        return result
+
+    def iter_found_properties(self, regex):
+        for resource in self.iter_resources():
+            for property in resource.config:
+                if self.validator.matches_regex_pattern(property, regex):
+                    yield TerraformProperty(resource.type,
+                                            resource.name,
+                                            property,
+                                            resource.config[property])
 
     def with_property(self, property_name, regex):
-        list = TerraformResourceList(self.validator, self.resource_types, {})
-        
-        if len(self.resource_list) > 0:
-            for resource in self.resource_list:
-                for property in resource.config:
-                    if(property == property_name):
-                        tf_property = TerraformProperty(resource.type,resource.name,property_name,resource.config[property_name])
-                        actual_property_value = self.validator.substitute_variable_values_in_string(tf_property.property_value)
-                        if self.validator.matches_regex_pattern(actual_property_value, regex):
-                            list.resource_list.append(resource)
-        
-        return list
+        if self.validator.lazy_evaluation:
+            return TerraformResourceList(self.validator, self.resource_types, {}, lambda: self.iter_resources_with_property(property_name, regex))
 
-    def should_have_properties(self, properties_list):
+        result = TerraformResourceList(self.validator, self.resource_types, {})
+        result.resource_list = list(self.iter_resources_with_property(property_name, regex))
+        return result
+
+    def iter_resources_with_property(self, property_name, regex):
+        for resource in self.iter_resources():
+            for property in resource.config:
+                if(property == property_name):
+                    tf_property = TerraformProperty(resource.type,resource.name,property_name,resource.config[property_name])
+                    actual_property_value = self.validator.substitute_variable_values_in_string(tf_property.property_value)
+                    if self.validator.matches_regex_pattern(actual_property_value, regex):
+                        yield resource
+
+    def collect_errors(self, check, *args):
         errors = []
+        profiler = self.validator.profiler
+        if profiler is not None:
+            start = timer()
+        count = 0
+        for resource in self.iter_resources():
+            errors.extend(check(resource, *args))
+            count += 1
+        if profiler is not None:
+            profiler.record("assertion", check.__name__[:-len("_errors")], timer() - start, count)
+        return errors
 
+    def should_have_properties(self, properties_list):
         if type(properties_list) is not list:
             properties_list = [properties_list]
 
-        if len(self.resource_list) > 0:
-            for resource in self.resource_list:
-                property_names = resource.config.keys()
-                for required_property_name in properties_list:
-                    if required_property_name not in property_names:
-                        errors.append(
-                            "[{0}.{1}] should have property: '{2}'".format(resource.type,
-                                                                           resource.name,
-                                                                           required_property_name))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        self.validator.raise_errors(self.collect_errors(self.should_have_properties_errors, properties_list))
+
+    def should_have_properties_errors(self, resource, properties_list):
+        if type(properties_list) is not list:
+            properties_list = [properties_list]
 
-    def should_not_have_properties(self, properties_list):
         errors = []
+        property_names = resource.config
+        for required_property_name in properties_list:
+            if required_property_name not in property_names:
+                errors.append(TerraformViolation(resource.type, resource.name, None, required_property_name, None,
+                                                 "[{0}.{1}] should have property: '{2}'", resource.type,
+                                                                                          resource.name,
+                                                                                          required_property_name))
+        return errors
 
+    def should_not_have_properties(self, properties_list):
         if type(properties_list) is not list:
             properties_list = [properties_list]
 
-        if len(self.resource_list) > 0:
-            for resource in self.resource_list:
-                property_names = resource.config.keys()
-                for excluded_property_name in properties_list:
-                    if excluded_property_name in property_names:
-                        errors.append(
-                            "[{0}.{1}] should not have property: '{2}'".format(resource.type,
-                                                                               resource.name,
-                                                                               excluded_property_name))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        self.validator.raise_errors(self.collect_errors(self.should_not_have_properties_errors, properties_list))
+
+    def should_not_have_properties_errors(self, resource, properties_list):
+        if type(properties_list) is not list:
+            properties_list = [properties_list]
 
+        errors = []
+        property_names = resource.config
+        for excluded_property_name in properties_list:
+            if excluded_property_name in property_names:
+                errors.append(TerraformViolation(resource.type, resource.name, None, None, excluded_property_name,
+                                                 "[{0}.{1}] should not have property: '{2}'", resource.type,
+                                                                                              resource.name,
+                                                                                              excluded_property_name))
+        return errors
 
     def name_should_match_regex(self,regex):
-        errors = []
-        for resource in self.resource_list:
-            if not self.validator.matches_regex_pattern(resource.name, regex):
-                errors.append("[{0}.{1}] name should match regex '{2}'".format(resource.type, resource.name, regex))
+        self.validator.raise_errors(self.collect_errors(self.name_should_match_regex_errors, regex))
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+    def name_should_match_regex_errors(self, resource, regex):
+        if not self.validator.matches_regex_pattern(resource.name, regex):
+            return [TerraformViolation(resource.type, resource.name, None, regex, resource.name,
+                                       "[{0}.{1}] name should match regex '{2}'", resource.type, resource.name, regex)]
+        return []
 
-class TerraformVariable:
+class TerraformVariable(object):
+
+    __slots__ = ('validator', 'name', 'value')
 
     def __init__(self,validator,name,value):
         self.validator = validator
@@ -405,74 +1199,899 @@ class TerraformVariable:
     def default_value_exists(self):
         errors = []
         if self.value == None:
-            errors.append("Variable '{0}' should have a default value".format(self.name))
+            errors.append(TerraformViolation("variable", self.name, "default", None, self.value,
+                                             "Variable '{0}' should have a default value", self.name))
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+        self.validator.raise_errors(errors)
 
     def default_value_equals(self,expected_value):
         errors = []
 
         if self.value != expected_value:
-            errors.append("Variable '{0}' should have a default value of {1}. Is: {2}".format(self.name,
-                                                                                            expected_value,
-                                                                                            self.value))
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+            errors.append(TerraformViolation("variable", self.name, "default", expected_value, self.value,
+                                             "Variable '{0}' should have a default value of {1}. Is: {2}", self.name,
+                                                                                                           expected_value,
+                                                                                                           self.value))
+        self.validator.raise_errors(errors)
 
     def default_value_matches_regex(self,regex):
         errors = []
         if not self.validator.matches_regex_pattern(self.value, regex):
-            errors.append("Variable '{0}' should have a default value that matches regex '{1}'. Is: {2}".format(self.name,regex,self.value))
+            errors.append(TerraformViolation("variable", self.name, "default", regex, self.value,
+                                             "Variable '{0}' should have a default value that matches regex '{1}'. Is: {2}", self.name,regex,self.value))
+
+        self.validator.raise_errors(errors)
+
+class TerraformRule(object):
+
+    def __init__(self, name, resource_types, property_path, check, *args):
+        # property_path is None for checks on the resources themselves, eg. should_have_properties
+        self.name = name
+        self.resource_types = resource_types
+        if property_path is None or isinstance(property_path, tuple):
+            self.property_path = property_path
+        elif isinstance(property_path, list):
+            self.property_path = tuple(property_path)
+        else:
+            self.property_path = tuple(property_path.split("."))
+        self.check = check
+        self.args = args
+
+class TerraformRuleResult(object):
+
+    def __init__(self, rule, violations):
+        self.rule = rule
+        self.violations = violations
+        self._errors = None
+
+    @property
+    def errors(self):
+        # Messages are only formatted when they are asked for
+        if self._errors is None:
+            self._errors = sorted(violation.message for violation in self.violations)
+        return self._errors
+
+    @property
+    def passed(self):
+        return len(self.violations) == 0
+
+class TerraformSnapshot(object):
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        # Parsed config and content hash of every .tf file, in the order the files are merged
+        self.files = collections.OrderedDict()
+        # Latest TerraformRuleResult of each rule, keyed by rule name, with the settings it was checked with
+        self.results = {}
+        # Resource types touched by the last update, None when every resource may have been affected
+        self.affected_resource_types = None
+
+    @classmethod
+    def load(cls, file_name):
+        with open(file_name, 'rb') as fp:
+            return pickle.load(fp)
+
+    def save(self, file_name):
+        with open(file_name, 'wb') as fp:
+            pickle.dump(self, fp, pickle.HIGHEST_PROTOCOL)
+
+    def update(self, validator, changed_files=None):
+        # Re-parses the files that changed, and returns the resource types they touch.
+        # Returns None when every resource may be affected, eg. when a variable changed
+        file_names = validator.list_terraform_files(self.path)
+        if changed_files is None:
+            candidates = file_names
+        else:
+            # changed_files only saves hashing the files already in the snapshot, new files are always parsed
+            changed_files = set(os.path.abspath(file_name) for file_name in changed_files)
+            candidates = [file_name for file_name in file_names if file_name in changed_files or file_name not in self.files]
+
+        affected_resource_types = set()
+        variables_changed = False
+        files = collections.OrderedDict()
+        current_files = set(file_names)
+        for file_name in list(self.files.keys()):
+            if file_name not in current_files:
+                old_terraform = self.files.pop(file_name)[1]
+                affected_resource_types.update(self.resource_types(old_terraform))
+                variables_changed = variables_changed or 'variable' in old_terraform
+
+        for file_name in candidates:
+            if file_name not in current_files:
+                continue
+            with open(file_name) as fp:
+                content = fp.read()
+            digest = hashlib.sha1(content.encode('utf-8') if not isinstance(content, bytes) else content).hexdigest()
+            old_terraform = None
+            if file_name in self.files:
+                if self.files[file_name][0] == digest:
+                    continue
+                old_terraform = self.files[file_name][1]
+
+            if validator.parse_cache is not None:
+                new_terraform = validator.parse_terraform_file(file_name)
+            else:
+                new_terraform = validator.parse_terraform_string(file_name, content)
+            self.files[file_name] = (digest, new_terraform)
+            if old_terraform is not None:
+                affected_resource_types.update(self.changed_resource_types(old_terraform, new_terraform))
+                variables_changed = variables_changed or old_terraform.get('variable') != new_terraform.get('variable')
+            else:
+                affected_resource_types.update(self.resource_types(new_terraform))
+                variables_changed = variables_changed or 'variable' in new_terraform
+
+        for file_name in file_names:
+            if file_name in self.files:
+                files[file_name] = self.files[file_name]
+        self.files = files
+
+        if variables_changed:
+            affected_resource_types = None
+        self.affected_resource_types = affected_resource_types
+        return affected_resource_types
+
+    def resource_types(self, terraform):
+        resources = terraform.get('resource', {})
+        if not isinstance(resources, dict):
+            return set()
+        return set(resources.keys())
+
+    def changed_resource_types(self, old_terraform, new_terraform):
+        old_resources = old_terraform.get('resource', {})
+        new_resources = new_terraform.get('resource', {})
+        if not isinstance(old_resources, dict) or not isinstance(new_resources, dict):
+            return self.resource_types(old_terraform) | self.resource_types(new_terraform)
+        resource_types = set(old_resources.keys()) | set(new_resources.keys())
+        return set(resource_type for resource_type in resource_types
+                   if old_resources.get(resource_type) != new_resources.get(resource_type))
+
+    def merged_config(self, validator):
+        # The merge changes the dicts it is given, so the parsed files are copied to keep them reusable
+        terraform = {}
+        for digest, new_terraform in self.files.values():
+            validator.merge_terraform_config(terraform, copy.deepcopy(new_terraform))
+        return terraform
 
-        if len(errors) > 0:
-            raise AssertionError("\n".join(sorted(errors)))
+    def invalidate_results(self, validator, affected_resource_types):
+        if affected_resource_types is None:
+            self.results = {}
+            return
+        for name, (settings, result) in list(self.results.items()):
+            resource_types = result.rule.resource_types
+            if isinstance(resource_types, list):
+                affected = len(affected_resource_types.intersection(resource_types)) > 0
+            else:
+                affected = any(validator.matches_regex_pattern(resource_type, resource_types) for resource_type in affected_resource_types)
+            if affected:
+                del self.results[name]
+
+    def get_result(self, rule, settings):
+        if rule.name not in self.results:
+            return None
+        stored_settings, result = self.results[rule.name]
+        if stored_settings != settings:
+            return None
+        return result
 
-class Validator:
+    def add_result(self, result, settings):
+        self.results[result.rule.name] = (settings, result)
+
+class TerraformWatcher(object):
+
+    def __init__(self, path, interval=0.5, snapshot=None, **kwargs):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        if snapshot is None:
+            snapshot = TerraformSnapshot(self.path)
+        self.snapshot = snapshot
+        # Each poll loads a copy of this Validator, so the options it was given, eg. cache_dir, and the
+        # behaviour functions set on it are kept
+        self.validator = Validator(**kwargs)
+        self.rules = []
+        self.checks = []
+        # mtime and size of every .tf file when it was last parsed, None until the first poll
+        self.signature = None
+        self.full_update = True
+        self.pending = True
+
+    def register(self, check):
+        # Takes a TerraformRule, or a function that runs assertions against a Validator
+        if isinstance(check, TerraformRule):
+            self.rules.append(check)
+        else:
+            self.checks.append(check)
+        self.pending = True
+        return check
 
-    def __init__(self,path=None):
+    def get_signature(self):
+        signature = {}
+        for file_name in self.validator.list_terraform_files(self.path):
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            signature[file_name] = (stat.st_mtime, stat.st_size)
+        return signature
+
+    def poll(self):
+        # Returns the error messages of the registered checks, or None when nothing changed since the last poll
+        signature = self.get_signature()
+        if self.signature is None:
+            changed_files = list(signature.keys())
+            removed = False
+        else:
+            changed_files = [file_name for file_name in signature if self.signature.get(file_name) != signature[file_name]]
+            removed = len(set(self.signature.keys()) - set(signature.keys())) > 0
+        if len(changed_files) == 0 and not removed and not self.pending:
+            return None
+        self.signature = signature
+        self.pending = False
+
+        if self.full_update:
+            changed_files = None
+        validator = copy.copy(self.validator)
+        try:
+            validator.load_snapshot(self.snapshot, changed_files)
+        except TerraformSyntaxException as e:
+            # The other changed files may not have been parsed, so the next update checks every file
+            self.full_update = True
+            return [str(e)]
+        self.validator = validator
+        self.full_update = False
+        return self.run_checks(self.validator)
+
+    def run_checks(self, validator):
+        messages = []
+        for result in validator.check_all(self.rules):
+            messages.extend(result.errors)
+        for check in self.checks:
+            # Each check gets its own copy of the Validator, so behaviour functions do not leak between checks
+            check_validator = copy.copy(validator)
+            check_validator.snapshot = None
+            check_validator.terraform_config = validator.terraform_config
+            collector = check_validator.collect_violations()
+            try:
+                check(check_validator)
+            except AssertionError as e:
+                messages.append(str(e))
+            except Exception as e:
+                messages.append("{0}: {1}".format(type(e).__name__, e))
+            messages.extend(collector.messages())
+        return sorted(messages)
+
+    def run(self, callback, iterations=None):
+        # Polls until interrupted, or for a number of iterations, calling callback(messages) after every change
+        while iterations is None or iterations > 0:
+            messages = self.poll()
+            if messages is not None:
+                callback(messages)
+            if iterations is not None:
+                iterations -= 1
+                if iterations == 0:
+                    break
+            time.sleep(self.interval)
+
+class TerraformModule(object):
+
+    def __init__(self, module_path, source, terraform, inputs):
+        # module_path is the tuple of module names leading to this instance, () for the root module
+        self.module_path = module_path
+        self.source = source
+        # Shared by every instance of the same source, which is only parsed once
+        self.terraform = terraform
+        # The arguments of the module block, other than source
+        self.inputs = inputs
+
+    @property
+    def name(self):
+        return ".".join(self.module_path)
+
+class Validator(object):
+
+    # Parsed configurations shared by Validator.for_path(), keyed by absolute path and the options they were loaded with
+    registry = {}
+
+    # Compiled regexes are shared by every Validator unless an instance sets its own cache
+    regex_cache = TerraformRegexCache()
+
+    interpolation_regex = re.compile(r'\${(.*?)}')
+
+    # Files without a match cannot declare variables, so they are not parsed when only the variables are needed
+    variable_block_regex = re.compile(r'(^|[{,])\s*"?variable"?(\s*[:{"]|\s+[\w-])', re.MULTILINE)
+
+    # The first available backend that handles a file's extension parses it
+    parser_backends = [TerraformJsonBackend(), TerraformPyhclParserBackend(), TerraformPyhclBackend()]
+
+    def __init__(self,path=None,cache_dir=None,cache_size=64 * 1024 * 1024,workers=None,profiler=None,parser_backend=None):
         self.variable_expand = False
         self.raise_error_if_property_missing = False
+        self.use_property_index = False
+        self.lazy_evaluation = False
+        self.violation_collector = None
+        self.snapshot = None
+        self.profiler = profiler
+        self.parser_backend = parser_backend
+        self.workers = workers
+        self.modules = None
+        self.module_path = ()
+        self.max_error_messages = None
+        self.parse_cache = None
+        self.clear_caches()
+        if cache_dir is not None:
+            self.parse_cache = TerraformParseCache(cache_dir, cache_size)
         if type(path) is not dict:
             if path is not None:
                 self.terraform_config = self.parse_terraform_directory(path)
         else:
             self.terraform_config = path
 
-    def resources(self, type):
-        if 'resource' not in self.terraform_config.keys():
-            resources = {}
+    @classmethod
+    def for_path(cls, path, check_for_changes=False, **kwargs):
+        # The configuration is shared, not copied, so changes made to it through one Validator are seen by the others
+        path = os.path.abspath(path)
+        key = cls.registry_key(path, kwargs)
+        validator = cls(**kwargs)
+        entry = cls.registry.get(key)
+        if entry is not None and check_for_changes:
+            if entry[1] != validator.get_directory_signature(path):
+                entry = None
+        if entry is None:
+            signature = validator.get_directory_signature(path)
+            entry = (validator.parse_terraform_directory(path), signature)
+            cls.registry[key] = entry
+        validator.terraform_config = entry[0]
+        return validator
+
+    @classmethod
+    def registry_key(cls, path, kwargs):
+        # Parser backends are compared by name, as each call may pass a new instance. The profiler only records
+        # timings, so Validators that only differ by their profiler share a configuration
+        options = []
+        for name, value in sorted(kwargs.items()):
+            if name == 'profiler':
+                continue
+            if isinstance(value, TerraformParserBackend):
+                value = value.name
+            options.append((name, value))
+        return path, tuple(options)
+
+    @classmethod
+    def aload(cls, path, executor=None, loop=None, **kwargs):
+        # Outputs an asyncio future of the Validator, so an event loop can await it while the files are read and parsed
+        # by executor. Any concurrent.futures executor works, its number of workers bounds the loads in flight.
+        # No async syntax is used, so the module still imports on Python 2
+        if loop is None:
+            loop = cls.get_event_loop()
+        return loop.run_in_executor(executor, functools.partial(cls, path, **kwargs))
+
+    def acheck_all(self, rules, executor=None, loop=None):
+        # Outputs an asyncio future of the check_all() results
+        if loop is None:
+            loop = self.get_event_loop()
+        return loop.run_in_executor(executor, self.check_all, rules)
+
+    @staticmethod
+    def get_event_loop():
+        # asyncio.get_event_loop() is deprecated when a loop is running, get_running_loop() is only in Python 3.7+
+        import asyncio
+        if hasattr(asyncio, 'get_running_loop'):
+            try:
+                return asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        return asyncio.get_event_loop()
+
+    @classmethod
+    def clear_registry(cls, path=None):
+        if path is None:
+            cls.registry.clear()
         else:
-            resources = self.terraform_config['resource']
+            path = os.path.abspath(path)
+            for key in [key for key in cls.registry if key[0] == path]:
+                del cls.registry[key]
+
+    @classmethod
+    def from_snapshot(cls, snapshot, changed_files=None, **kwargs):
+        validator = cls(**kwargs)
+        validator.load_snapshot(snapshot, changed_files)
+        return validator
+
+    def load_snapshot(self, snapshot, changed_files=None):
+        snapshot.invalidate_results(self, snapshot.update(self, changed_files))
+        self.terraform_config = snapshot.merged_config(self)
+        self.snapshot = snapshot
+
+    def get_directory_signature(self, path):
+        signature = []
+        for file_name in self.list_terraform_files(path):
+            stat = os.stat(file_name)
+            signature.append((file_name, stat.st_mtime, stat.st_size))
+        return signature
+
+    @property
+    def terraform_config(self):
+        return self._terraform_config
+
+    @terraform_config.setter
+    def terraform_config(self, terraform_config):
+        self._terraform_config = terraform_config
+        self.clear_caches()
+
+    def clear_caches(self):
+        self.resource_index = None
+        self.resource_type_matches = {}
+        self.property_index = {}
+        self.interpolation_cache = {}
+
+    def get_resource_configs(self):
+        if 'resource' not in self.terraform_config.keys():
+            return {}
+        return self.terraform_config['resource']
+
+    def get_resource_index(self):
+        if self.resource_index is None:
+            resources = self.get_resource_configs()
+            resource_index = {}
+            for resource_type in resources:
+                resource_index[resource_type] = [TerraformResource(resource_type,resource,resources[resource_type][resource])
+                                                 for resource in resources[resource_type]]
+            self.resource_index = resource_index
+        return self.resource_index
+
+    def get_resource_types(self, regex):
+        if regex not in self.resource_type_matches:
+            self.resource_type_matches[regex] = [resource_type for resource_type in self.get_resource_configs()
+                                                 if self.matches_regex_pattern(resource_type, regex)]
+        return list(self.resource_type_matches[regex])
 
-        return TerraformResourceList(self, type, resources)
+    def resources(self, type):
+        if self.profiler is not None:
+            start = timer()
+            query = type
+        if not isinstance(type, list):
+            type = self.get_resource_types(type)
+
+        if self.lazy_evaluation:
+            resource_list = TerraformResourceList(self, type, {}, lambda: self.iter_resources(type))
+            if self.profiler is not None:
+                self.profiler.record("resources", str(query), timer() - start)
+            return resource_list
+
+        resource_list = TerraformResourceList(self, type, self.get_resource_index())
+        resource_list.indexed = True
+        if self.profiler is not None:
+            self.profiler.record("resources", str(query), timer() - start, len(resource_list.resource_list))
+        return resource_list
+
+    def iter_resources(self, resource_types):
+        resources = self.get_resource_configs()
+        for resource_type in resource_types:
+            if resource_type in resources:
+                for resource in resources[resource_type]:
+                    yield TerraformResource(resource_type,resource,resources[resource_type][resource])
+
+    def get_property_index_entry(self, resource_type, property_path):
+        key = (resource_type, property_path)
+        if key not in self.property_index:
+            if len(property_path) == 1:
+                parent = TerraformResourceList(self, [resource_type], self.get_resource_index())
+            else:
+                parent = TerraformPropertyList(self)
+                parent.properties = self.get_property_index_entry(resource_type, property_path[:-1])[0]
+            self.property_index[key] = parent.collect_properties(property_path[-1], True)
+        return self.property_index[key]
+
+    def get_indexed_properties(self, resource_types, property_path):
+        result = TerraformPropertyList(self)
+        missing = []
+        for resource_type in resource_types:
+            properties, resource_type_missing = self.get_property_index_entry(resource_type, property_path)
+            result.properties.extend(properties)
+            missing.extend(resource_type_missing)
+
+        if self.raise_error_if_property_missing:
+            self.raise_missing_properties(missing)
+
+        result.resource_types = resource_types
+        result.property_path = property_path
+        return result
+
+    def missing_property_errors(self, missing):
+        return [TerraformViolation.for_property_name(resource_type, resource_name, property_name, property_name, None,
+                                                     "[{0}.{1}] should have property: '{2}'", resource_type, resource_name, property_name)
+                for resource_type, resource_name, property_name in missing]
+
+    def raise_missing_properties(self, missing):
+        self.raise_errors(self.missing_property_errors(missing))
+
+    def set_module_path(self, violations):
+        if len(self.module_path) > 0:
+            for violation in violations:
+                violation.module_path = self.module_path
+        return violations
+
+    def raise_errors(self, errors):
+        if len(errors) == 0:
+            return
+        self.set_module_path(errors)
+        if self.violation_collector is not None:
+            self.violation_collector.add(errors)
+            return
+        if self.profiler is not None:
+            start = timer()
+        message = TerraformViolation.join_messages(errors, self.max_error_messages)
+        if self.profiler is not None:
+            self.profiler.record("format", "errors", timer() - start, len(errors))
+        raise AssertionError(message)
+
+    def check_all(self, rules):
+        if self.snapshot is None:
+            return self.run_rules(rules)
+
+        # The snapshot stores results by rule name, so names have to be unique
+        names = set()
+        for rule in rules:
+            if rule.name in names:
+                raise TerraformRuleException("There is more than one rule named '{0}'".format(rule.name))
+            names.add(rule.name)
+
+        # Only rules without a stored result for the current files are run again
+        results = [None] * len(rules)
+        stale_rules = []
+        for rule_index, rule in enumerate(rules):
+            results[rule_index] = self.snapshot.get_result(rule, self.rule_settings(rule))
+            if results[rule_index] is None:
+                stale_rules.append(rule_index)
+        for rule_index, result in zip(stale_rules, self.run_rules([rules[rule_index] for rule_index in stale_rules])):
+            self.snapshot.add_result(result, self.rule_settings(result.rule))
+            results[rule_index] = result
+        return results
+
+    def rule_settings(self, rule):
+        return (rule.resource_types, rule.property_path, rule.check, rule.args,
+                self.variable_expand, self.raise_error_if_property_missing)
+
+    def run_rules(self, rules):
+        if self.profiler is None:
+            return self.walk_rules(rules)
+        start = timer()
+        results = self.walk_rules(rules)
+        self.profiler.record("check_all", "rules", timer() - start, len(rules))
+        return results
+
+    def walk_rules(self, rules):
+        # Every resource is walked once, and each property path is only looked up once per resource
+        resource_checker = TerraformResourceList(self, [], {})
+        property_checker = TerraformPropertyList(self)
+        resource_index = self.get_resource_index()
+
+        checks = []
+        rules_by_type = collections.OrderedDict()
+        for rule_index, rule in enumerate(rules):
+            checker = resource_checker if rule.property_path is None else property_checker
+            if rule.check not in checker.rule_checks:
+                raise TerraformRuleException("Unknown check '{0}' in rule '{1}'".format(rule.check, rule.name))
+            checks.append(getattr(checker, rule.check + "_errors"))
+
+            resource_types = rule.resource_types
+            if not isinstance(resource_types, list):
+                resource_types = self.get_resource_types(resource_types)
+            for resource_type in resource_types:
+                rules_by_type.setdefault(resource_type, []).append(rule_index)
+
+        errors = [[] for rule in rules]
+        missing = [{} for rule in rules]
+        # With missing properties as errors, the depth and exception of the first failure of each rule, eg. a
+        # property of the wrong type. It is only raised if the chained calls would get to it before a missing property
+        failures = [None for rule in rules]
+        for resource_type, rule_indexes in rules_by_type.items():
+            for resource in resource_index.get(resource_type, []):
+                resource_list = TerraformResourceList(self, [], {})
+                resource_list.resource_list = [resource]
+                properties_by_path = {}
+
+                def _walk(property_path):
+                    if property_path not in properties_by_path:
+                        if len(property_path) == 1:
+                            parent = resource_list
+                        else:
+                            parent = TerraformPropertyList(self)
+                            parent.properties = _walk(property_path[:-1])[0]
+                        properties_by_path[property_path] = parent.collect_properties(property_path[-1], True)
+                    return properties_by_path[property_path]
+
+                for rule_index in rule_indexes:
+                    rule = rules[rule_index]
+                    if rule.property_path is None:
+                        errors[rule_index].extend(checks[rule_index](resource, *rule.args))
+                        continue
+
+                    depth = 0
+                    try:
+                        for depth in range(1, len(rule.property_path) + 1):
+                            resource_missing = _walk(rule.property_path[:depth])[1]
+                            if len(resource_missing) > 0:
+                                missing[rule_index].setdefault(depth, []).extend(resource_missing)
+                        depth = len(rule.property_path) + 1
+                        for property in _walk(rule.property_path)[0]:
+                            errors[rule_index].extend(checks[rule_index](property, *rule.args))
+                    except Exception as e:
+                        if not self.raise_error_if_property_missing:
+                            raise
+                        if failures[rule_index] is None or depth < failures[rule_index][0]:
+                            failures[rule_index] = (depth, e)
+
+        results = []
+        for rule_index, rule in enumerate(rules):
+            failure = failures[rule_index]
+            if failure is not None and (len(missing[rule_index]) == 0 or failure[0] <= min(missing[rule_index])):
+                # The chained call raises while it collects the properties, before it reports the missing ones
+                raise failure[1]
+            if self.raise_error_if_property_missing and len(missing[rule_index]) > 0:
+                # A chain of .property() calls stops at the first one with missing properties
+                results.append(TerraformRuleResult(rule, self.set_module_path(self.missing_property_errors(missing[rule_index][min(missing[rule_index])]))))
+            else:
+                results.append(TerraformRuleResult(rule, self.set_module_path(errors[rule_index])))
+        return results
 
     def variable(self, name):
         return TerraformVariable(self, name, self.get_terraform_variable_value(name))
 
     def enable_variable_expansion(self):
         self.variable_expand = True
+        self.interpolation_cache = {}
 
     def disable_variable_expansion(self):
         self.variable_expand = False
+        self.interpolation_cache = {}
+
+    def enable_profiling(self, profiler=None):
+        if profiler is None:
+            profiler = TerraformProfiler()
+        self.profiler = profiler
+        return profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def limit_error_messages(self, max_messages=None):
+        # None goes back to raising every message
+        self.max_error_messages = max_messages
 
     def error_if_property_missing(self):
         self.raise_error_if_property_missing = True
 
+    def collect_violations(self, collector=None):
+        if collector is None:
+            collector = TerraformViolationCollector()
+        self.violation_collector = collector
+        return collector
+
+    def stop_collecting_violations(self):
+        self.violation_collector = None
+
+    def enable_lazy_evaluation(self):
+        self.lazy_evaluation = True
+
+    def disable_lazy_evaluation(self):
+        self.lazy_evaluation = False
+
+    def enable_property_index(self):
+        self.use_property_index = True
+
+    def disable_property_index(self):
+        self.use_property_index = False
+        self.property_index = {}
+
+    def load_modules(self, path):
+        # Loads path as the root module, and every module it calls from a local source, as TerraformModule objects.
+        # Modules are loaded a level at a time, and every file of the new sources in a level is parsed in one batch
+        path = os.path.abspath(path)
+        sources = {}
+        modules = collections.OrderedDict()
+        level = [((), path, {}, ())]
+        while len(level) > 0:
+            new_sources = []
+            for module_path, source, inputs, parents in level:
+                if source not in sources and source not in new_sources:
+                    new_sources.append(source)
+            self.parse_module_sources(new_sources, sources)
+
+            next_level = []
+            for module_path, source, inputs, parents in level:
+                terraform = sources[source]
+                modules[module_path] = TerraformModule(module_path, source, terraform, inputs)
+                for name, config in self.get_module_blocks(terraform):
+                    module_source = config.get('source')
+                    if not isinstance(module_source, string_types) or not module_source.startswith(('./', '../')):
+                        continue
+                    child_source = os.path.normpath(os.path.join(source, module_source))
+                    if not os.path.isdir(child_source):
+                        raise TerraformModuleException("The source '{0}' of module '{1}' is not a directory".format(module_source, ".".join(module_path + (name,))))
+                    if child_source in parents + (source,):
+                        raise TerraformModuleException("Module '{0}' calls its own source '{1}'".format(".".join(module_path + (name,)), module_source))
+                    child_inputs = dict((key, value) for key, value in config.items() if key != 'source')
+                    next_level.append((module_path + (name,), child_source, child_inputs, parents + (source,)))
+            level = next_level
+
+        self.terraform_config = modules[()].terraform
+        self.modules = modules
+        return modules
+
+    def parse_module_sources(self, module_sources, sources):
+        file_names = []
+        for source in module_sources:
+            sources[source] = {}
+            file_names.extend(self.list_module_files(source))
+        for index, terraform in enumerate(self.parse_terraform_files(file_names)):
+            self.merge_terraform_config(sources[os.path.dirname(file_names[index])], terraform)
+
+    def list_module_files(self, source):
+        # Unlike list_terraform_files(), sub directories are not part of a module
+        return [os.path.join(source, file) for file in sorted(os.listdir(source))
+                if (file.endswith(".tf") or file.endswith(".tf.json")) and os.path.isfile(os.path.join(source, file))]
+
+    def get_module_blocks(self, terraform):
+        modules = terraform.get('module', {})
+        for block in self.convert_to_list(modules):
+            if isinstance(block, dict):
+                for name, config in block.items():
+                    if isinstance(config, dict):
+                        yield name, config
+
+    def module(self, name):
+        # Outputs a copy of this Validator that only sees the resources of one module instance, eg. "network.subnets"
+        if self.modules is None:
+            raise TerraformModuleException("No modules have been loaded, use load_modules() first")
+        module_path = tuple(name.split(".")) if isinstance(name, string_types) else tuple(name)
+        if module_path not in self.modules:
+            raise TerraformModuleException("There is no module '{0}'".format(".".join(module_path)))
+        return self.get_module_validator(self.modules[module_path])
+
+    def iter_module_validators(self):
+        for module in self.modules.values():
+            yield self.get_module_validator(module)
+
+    def get_module_validator(self, module):
+        validator = copy.copy(self)
+        validator.snapshot = None
+        validator.module_path = module.module_path
+        validator.terraform_config = module.terraform
+        return validator
+
     def parse_terraform_directory(self,path):
 
-        terraform_string = ""
+        terraform = {}
+        for new_terraform in self.parse_terraform_files(self.list_terraform_files(path)):
+            self.merge_terraform_config(terraform, new_terraform)
+        return terraform
+
+    def parse_terraform_files(self,file_names):
+        if self.workers is None or self.workers < 2 or len(file_names) < 2:
+            for file_name in file_names:
+                if self.profiler is None:
+                    yield self.parse_terraform_file(file_name)
+                else:
+                    start = timer()
+                    terraform = self.parse_terraform_file(file_name)
+                    self.profiler.record("parse", file_name, timer() - start)
+                    yield terraform
+            return
+
+        cache_dir = None
+        cache_size = None
+        if self.parse_cache is not None:
+            cache_dir = self.parse_cache.path
+            cache_size = self.parse_cache.max_size
+
+        workers = min(self.workers, len(file_names))
+        chunksize = max(1, len(file_names) // (workers * 4))
+        pool = multiprocessing.Pool(workers, _init_parse_worker, (cache_dir, cache_size, self.parser_backend))
+        try:
+            # imap hands the results back in the order of file_names, so the merge is the same as a serial parse
+            for index, (terraform, hits, misses, duration) in enumerate(pool.imap(_parse_terraform_file, file_names, chunksize)):
+                if self.parse_cache is not None:
+                    self.parse_cache.hits += hits
+                    self.parse_cache.misses += misses
+                if self.profiler is not None:
+                    self.profiler.record("parse", file_names[index], duration)
+                yield terraform
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def iter_file_validators(self, path):
+        # Yields a copy of this Validator for each .tf file in turn, so that only one file is parsed at a time.
+        # Every copy keeps the behaviour functions of this Validator, and sees the variables of the whole directory.
+        # Files that declare variables were already parsed to find them, so they are yielded first and not parsed again
+        file_names = self.list_terraform_files(path)
+        parsed = collections.OrderedDict()
+        variables = self.parse_terraform_variables(file_names, parsed)
+        remaining = [file_name for file_name in file_names if file_name not in parsed]
+        while len(parsed) > 0:
+            file_name, terraform = parsed.popitem(last=False)
+            yield self.get_file_validator(terraform, variables)
+        for file_name in remaining:
+            yield self.get_file_validator(self.parse_terraform_file(file_name), variables)
+
+    def get_file_validator(self, terraform, variables):
+        if 'variable' in variables:
+            terraform['variable'] = variables['variable']
+        validator = copy.copy(self)
+        validator.snapshot = None
+        validator.terraform_config = terraform
+        return validator
+
+    def parse_terraform_variables(self, file_names, parsed=None):
+        # When parsed is given, the configuration of every file that was parsed is stored in it, keyed by file name
+        variables = {}
+        for file_name in file_names:
+            with open(file_name) as fp:
+                if self.variable_block_regex.search(fp.read()) is None:
+                    continue
+            terraform = self.parse_terraform_file(file_name)
+            if parsed is not None:
+                parsed[file_name] = terraform
+            if 'variable' in terraform:
+                self.merge_terraform_config(variables, {'variable': terraform['variable']})
+        return variables
+
+    def check_files(self, path, rules):
+        # Same as check_all(), but the rules are run against one file at a time instead of the merged configuration
+        violations = [[] for rule in rules]
+        for validator in self.iter_file_validators(path):
+            for rule_index, result in enumerate(validator.run_rules(rules)):
+                violations[rule_index].extend(result.violations)
+        return [TerraformRuleResult(rule, violations[rule_index]) for rule_index, rule in enumerate(rules)]
+
+    def list_terraform_files(self,path):
+        terraform_files = []
         for directory, subdirectories, files in os.walk(path):
             for file in files:
-                if (file.endswith(".tf")):
-                    with open(os.path.join(directory, file)) as fp:
-                        new_terraform = fp.read()
-                        try:
-                            hcl.loads(new_terraform)
-                        except ValueError as e:
-                            raise TerraformSyntaxException("Invalid terraform configuration in {0}\n{1}".format(os.path.join(directory,file),e))
-                        terraform_string += new_terraform
-        terraform = hcl.loads(terraform_string)
+                if file.endswith(".tf") or file.endswith(".tf.json"):
+                    terraform_files.append(os.path.join(directory, file))
+        return terraform_files
+
+    def parse_terraform_file(self,file_name):
+        if self.parse_cache is not None:
+            return self.parse_cache.load(file_name, self.parse_terraform_string, self.get_parser_backend(file_name).name)
+        with open(file_name) as fp:
+            return self.parse_terraform_string(file_name, fp.read())
+
+    def get_parser_backend(self, file_name):
+        if self.parser_backend is not None:
+            return self.parser_backend
+        for backend in self.parser_backends:
+            if backend.handles(file_name) and backend.available():
+                return backend
+        return TerraformPyhclBackend()
+
+    def parse_terraform_string(self,file_name,terraform_string):
+        try:
+            return self.get_parser_backend(file_name).parse(terraform_string)
+        except ValueError as e:
+            raise TerraformSyntaxException("Invalid terraform configuration in {0}\n{1}".format(file_name,e))
+
+    def merge_terraform_config(self, terraform, new_terraform):
+        # Mirrors the way pyhcl merges duplicate top level keys, so that merging
+        # the files one by one gives the same result as parsing them joined together
+        for key, value in new_terraform.items():
+            if not isinstance(value, dict):
+                terraform[key] = value
+                continue
+            merged = terraform.setdefault(key, {})
+            for nested_key, nested_value in value.items():
+                if type(merged) == list:
+                    merged.append({nested_key: nested_value})
+                elif nested_key in merged.keys():
+                    if hasattr(nested_value, 'items'):
+                        for k, v in nested_value.items():
+                            merged[nested_key][k] = v
+                    else:
+                        terraform[key] = [merged, {nested_key: nested_value}]
+                else:
+                    merged[nested_key] = nested_value
         return terraform
 
     def get_terraform_resources(self, name, resources):
@@ -484,16 +2103,9 @@ class Validator:
         return not (self.get_regex_matches(regex, variable) is None)
 
     def get_regex_matches(self, regex, variable):
-        if regex[-1:] != "$":
-            regex = regex + "$"
-
-        if regex[0] != "^":
-            regex = "^" + regex
-
-        variable = str(variable)
-        if '\n' in variable:
-            return re.match(regex, variable, re.DOTALL)
-        return re.match(regex, variable)
+        if not isinstance(variable, str):
+            variable = str(variable)
+        return self.regex_cache.compile(regex, '\n' in variable).match(variable)
 
     def get_terraform_variable_value(self,variable):
         if ('variable' not in self.terraform_config.keys()) or (variable not in self.terraform_config['variable'].keys()):
@@ -506,22 +2118,36 @@ class Validator:
         if self.variable_expand:
             if not isinstance(s,dict):
                 for variable in self.list_terraform_variables_in_string(s):
-                    a = TerraformVariableParser(variable)
-                    a.parse()
-                    variable_default_value = self.get_terraform_variable_value(a.variable)
-                    if variable_default_value != None:
-                        for function in a.functions:
-                            if function == "lower":
-                                variable_default_value = variable_default_value.lower()
-                            elif function == "upper":
-                                variable_default_value = variable_default_value.upper()
-                            else:
-                                raise TerraformUnimplementedInterpolationException("The interpolation function '{0}' has not been implemented in Terraform Validator yet. Suggest you run disable_variable_expansion().".format(function))
-                        s = s.replace("${" + variable + "}",variable_default_value)
+                    variable_value = self.get_interpolated_value(variable)
+                    if variable_value != None:
+                        s = s.replace("${" + variable + "}",variable_value)
         return s
 
+    def get_interpolated_value(self, interpolation):
+        # Errors are not cached, so a missing variable or unimplemented function raises on every use
+        if interpolation not in self.interpolation_cache:
+            if self.profiler is not None:
+                start = timer()
+            a = TerraformVariableParser(interpolation)
+            a.parse()
+            variable_default_value = self.get_terraform_variable_value(a.variable)
+            if variable_default_value != None:
+                for function in a.functions:
+                    if function == "lower":
+                        variable_default_value = variable_default_value.lower()
+                    elif function == "upper":
+                        variable_default_value = variable_default_value.upper()
+                    else:
+                        raise TerraformUnimplementedInterpolationException("The interpolation function '{0}' has not been implemented in Terraform Validator yet. Suggest you run disable_variable_expansion().".format(function))
+            self.interpolation_cache[interpolation] = variable_default_value
+            if self.profiler is not None:
+                self.profiler.record("interpolation", interpolation, timer() - start)
+        return self.interpolation_cache[interpolation]
+
     def list_terraform_variables_in_string(self, s):
-        return re.findall('\${(.*?)}',str(s))
+        if not isinstance(s, str):
+            s = str(s)
+        return self.interpolation_regex.findall(s)
 
     def convert_to_list(self, nested_resources):
         if not type(nested_resources) == list:
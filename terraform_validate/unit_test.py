@@ -1,5 +1,21 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import time
 import unittest
+import hcl
+import json
+
+try:
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+except ImportError:
+    asyncio = None
 import terraform_validate as t
+# The module itself, for its module level names, eg. the optional numpy import
+import terraform_validate.terraform_validate as tv_module
 
 class TestValidatorNeoUnitHelper(unittest.TestCase):
 
@@ -45,6 +61,107 @@ class TestValidatorNeoUnitHelper(unittest.TestCase):
         a = v.resources("aws_.*").property('value')
         self.assertEqual(len(a.properties), 1)
 
+    def test_resource_index_is_built_once(self):
+        resources = {'resource': {'aws_instance': {'foo': {'value': 1}}, "aws_rds_instance": {'bar': {'value': 1}}}}
+        v = t.Validator(resources)
+        index = v.get_resource_index()
+        v.resources('aws_.*').property('value').should_equal(1)
+        v.resources(['aws_instance']).property('value').should_equal(1)
+        self.assertIs(v.get_resource_index(), index)
+        self.assertEqual(sorted(v.resource_type_matches['aws_.*']), ['aws_instance', 'aws_rds_instance'])
+        self.assertIs(v.resources('aws_instance').resource_list[0], index['aws_instance'][0])
+
+    def test_resource_index_is_rebuilt_when_config_changes(self):
+        v = t.Validator({'resource': {'aws_instance': {'foo': {'value': 1}}}})
+        self.assertEqual(len(v.resources('aws_.*').resource_list), 1)
+        v.terraform_config = {'resource': {'aws_elb': {'foo': {'value': 1}}, 'aws_instance': {'bar': {'value': 1}}}}
+        self.assertEqual(len(v.resources('aws_.*').resource_list), 2)
+
+    def test_property_index_reuses_nested_properties(self):
+        resources = {'resource': {'aws_instance': {'foo': {'ebs_block_device': [{'encrypted': True}, {'encrypted': False}]}}}}
+        v = t.Validator(resources)
+        v.enable_property_index()
+        a = v.resources('aws_instance').property('ebs_block_device').property('encrypted')
+        b = v.resources('aws_instance').property('ebs_block_device').property('encrypted')
+        self.assertEqual([p.property_value for p in a.properties], [True, False])
+        self.assertEqual([p.resource_name for p in a.properties], ['foo.ebs_block_device', 'foo.ebs_block_device'])
+        self.assertIs(a.properties[0], b.properties[0])
+        self.assertIn(('aws_instance', ('ebs_block_device', 'encrypted')), v.property_index)
+
+    def test_property_index_raises_missing_properties(self):
+        resources = {'resource': {'aws_instance': {'foo': {'value': 1}, 'bar': {}}}}
+        v = t.Validator(resources)
+        v.enable_property_index()
+        self.assertEqual(len(v.resources('aws_instance').property('value').properties), 1)
+        v.error_if_property_missing()
+        self.assertRaisesRegexp(AssertionError, "^\\[aws_instance.bar\\] should have property: 'value'$", v.resources('aws_instance').property, 'value')
+
+    def test_lazy_evaluation_builds_nothing_until_assertion(self):
+        resources = {'resource': {'aws_instance': {'foo': {'tags': {'value': 1}}, 'bar': {'tags': {'value': 2}}}}}
+        v = t.Validator(resources)
+        v.enable_lazy_evaluation()
+        a = v.resources('aws_.*').with_property('tags', '.*').property('tags').find_property('val.*')
+        self.assertIsNotNone(a.source)
+        self.assertIsNone(v.resource_index)
+        self.assertRaisesRegexp(AssertionError, "^\\[aws_instance.bar.tags.value\\] should be '1'. Is: '2'$", a.should_equal, 1)
+        self.assertEqual(len(a.properties), 2)
+        self.assertIsNone(a.source)
+
+    def test_lazy_evaluation_raises_missing_properties_on_assertion(self):
+        resources = {'resource': {'aws_instance': {'foo': {'value': 1}, 'bar': {}}}}
+        v = t.Validator(resources)
+        v.enable_lazy_evaluation()
+        v.error_if_property_missing()
+        a = v.resources('aws_instance').property('value')
+        self.assertRaisesRegexp(AssertionError, "^\\[aws_instance.bar\\] should have property: 'value'$", a.should_equal, 1)
+
+    def test_check_all_matches_chained_assertions(self):
+        resources = {'resource': {'aws_instance': {'foo': {'tags': {'value': 1}}, 'bar': {'tags': {'value': 2}}}, 'aws_elb': {'buzz': {'tags': {}}}}}
+        v = t.Validator(resources)
+        results = v.check_all([t.TerraformRule("tag value", "aws_.*", "tags.value", "should_equal", 1),
+                               t.TerraformRule("tags", "aws_.*", "tags", "should_have_properties", "value")])
+        for result, assertion in zip(results, [v.resources("aws_.*").property("tags").property("value").should_equal,
+                                               v.resources("aws_.*").property("tags").should_have_properties]):
+            try:
+                assertion(*result.rule.args)
+                self.assertTrue(result.passed)
+            except AssertionError as e:
+                self.assertEqual("\n".join(result.errors), str(e))
+
+    def test_check_all_matches_chained_assertions_with_missing_properties(self):
+        # Properties of the wrong type are only reached when no resource is missing a property on the way
+        resources = {'resource': {'aws_instance': {'foo': {'acl': 'private', 'tags': 'a', 'list': {'value': 1}},
+                                                   'bar': {'tags': {'value': 2}, 'list': 'b'},
+                                                   'buzz': {'acl': 'public', 'tags': {'value': 3}, 'list': {'value': 1}}}}}
+        cases = [("acl", "should_have_properties", ["value"]), ("acl", "list_should_contain", ["a"]),
+                 ("tags.value", "should_equal", 1), ("list.value", "should_equal", 1), ("list.value.x", "should_equal", 1)]
+        for property_path, check, args in cases:
+            v = t.Validator(resources)
+            v.error_if_property_missing()
+
+            def chained():
+                properties = v.resources("aws_instance")
+                for property_name in property_path.split("."):
+                    properties = properties.property(property_name)
+                getattr(properties, check)(args)
+
+            try:
+                chained()
+                expected = None
+            except AssertionError as e:
+                expected = str(e)
+            except (AttributeError, TypeError) as e:
+                self.assertRaises(type(e), v.check_all, [t.TerraformRule("rule", "aws_instance", property_path, check, args)])
+                continue
+            result = v.check_all([t.TerraformRule("rule", "aws_instance", property_path, check, args)])[0]
+            self.assertEqual("\n".join(result.errors) if not result.passed else None, expected, property_path)
+
+    def test_check_all_rejects_unknown_checks(self):
+        v = t.Validator({'resource': {}})
+        self.assertRaises(t.TerraformRuleException, v.check_all, [t.TerraformRule("bad", "aws_.*", None, "should_equal", 1)])
+        for check in ["collect", "row", "missing_property"]:
+            self.assertRaises(t.TerraformRuleException, v.check_all, [t.TerraformRule("bad", "aws_.*", "value", check, 1)])
+
 class TestValidatorUnitHelper(unittest.TestCase):
 
     def test_get_terraform_resource_that_exists(self):
@@ -79,6 +196,29 @@ class TestValidatorUnitHelper(unittest.TestCase):
         a = v.matches_regex_pattern('abc_123', 'abc')
         self.assertFalse(a)
 
+    def test_regex_cache_reuses_compiled_patterns(self):
+        v = t.Validator()
+        v.regex_cache = t.TerraformRegexCache()
+        self.assertTrue(v.matches_regex_pattern('abc_123', 'abc_[0-9]+'))
+        self.assertFalse(v.matches_regex_pattern('abc_def', 'abc_[0-9]+'))
+        self.assertTrue(v.matches_regex_pattern(1, '[0-9]'))
+        self.assertEqual((v.regex_cache.hits, v.regex_cache.misses), (1, 2))
+
+    def test_regex_cache_keeps_multiline_patterns_separate(self):
+        v = t.Validator()
+        v.regex_cache = t.TerraformRegexCache()
+        self.assertTrue(v.matches_regex_pattern('abc_x123', 'abc_.123'))
+        self.assertTrue(v.matches_regex_pattern('abc_\n123', 'abc_.123'))
+        self.assertEqual((v.regex_cache.hits, v.regex_cache.misses), (0, 2))
+
+    def test_regex_cache_evicts_least_recently_used(self):
+        cache = t.TerraformRegexCache(max_size=2)
+        cache.compile('a')
+        cache.compile('b')
+        cache.compile('a')
+        cache.compile('c')
+        self.assertEqual(list(cache.patterns.keys()), [('a', False), ('c', False)])
+
     def test_can_handle_no_variables_in_string(self):
         v = t.Validator()
         a = v.list_terraform_variables_in_string("wibble")
@@ -104,6 +244,26 @@ class TestValidatorUnitHelper(unittest.TestCase):
         a = v.list_terraform_variables_in_string(1)
         self.assertEqual(a, [])
 
+    def test_query_objects_have_no_instance_dict(self):
+        self.assertFalse(hasattr(t.TerraformProperty('aws_instance', 'foo', 'value', 1), '__dict__'))
+        self.assertFalse(hasattr(t.TerraformResource('aws_instance', 'foo', {}), '__dict__'))
+        self.assertFalse(hasattr(t.TerraformVariable(None, 'foo', 1), '__dict__'))
+
+    def test_interpolations_are_cached(self):
+        v = t.Validator({'variable': {'foo': {'default': 'aBc'}}})
+        v.enable_variable_expansion()
+        self.assertEqual(v.substitute_variable_values_in_string("${lower(var.foo)}-${upper(var.foo)}"), "abc-ABC")
+        self.assertEqual(v.interpolation_cache, {'lower(var.foo)': 'abc', 'upper(var.foo)': 'ABC'})
+        v.disable_variable_expansion()
+        self.assertEqual(v.interpolation_cache, {})
+
+    def test_interpolation_cache_is_cleared_when_config_changes(self):
+        v = t.Validator({'variable': {'foo': {'default': '1'}}})
+        v.enable_variable_expansion()
+        self.assertEqual(v.substitute_variable_values_in_string("${var.foo}"), "1")
+        v.terraform_config = {'variable': {'foo': {'default': '2'}}}
+        self.assertEqual(v.substitute_variable_values_in_string("${var.foo}"), "2")
+
     def test_bool_to_str(self):
         a = t.TerraformPropertyList(None)
         self.assertEqual(t.TerraformPropertyList.bool2str(a,True),"True")
@@ -112,6 +272,692 @@ class TestValidatorUnitHelper(unittest.TestCase):
         self.assertEqual(t.TerraformPropertyList.bool2str(a, "False"), "False")
 
 
+    def test_merge_terraform_config_matches_joined_parse(self):
+        first = 'resource "aws_instance" "foo" { value = 1 }\nvariable "foo" { default = "1" }\n'
+        second = 'resource "aws_instance" "bar" { value = 2 }\nresource "aws_elb" "foo" { value = 3 }\nvariable "foo" { default = "2" }\n'
+        v = t.Validator()
+        merged = {}
+        v.merge_terraform_config(merged, hcl.loads(first))
+        v.merge_terraform_config(merged, hcl.loads(second))
+        self.assertEqual(merged, hcl.loads(first + second))
+
+    def test_parse_terraform_directory_matches_joined_parse(self):
+        path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+        v = t.Validator()
+        joined = ""
+        for file_name in v.list_terraform_files(path):
+            with open(file_name) as fp:
+                joined += fp.read()
+        self.assertEqual(v.parse_terraform_directory(path), hcl.loads(joined))
+
+
+class TerraformDirectoryTestCase(unittest.TestCase):
+    # Copies fixtures/multiple_files to a temporary directory, so tests can change its files
+
+    def setUp(self):
+        self.terraform_dir = tempfile.mkdtemp()
+        fixture = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+        shutil.rmtree(self.terraform_dir)
+        shutil.copytree(fixture, self.terraform_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.terraform_dir)
+
+
+class TestTerraformParseCache(TerraformDirectoryTestCase):
+
+    def setUp(self):
+        super(TestTerraformParseCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        super(TestTerraformParseCache, self).tearDown()
+
+    def test_warm_cache_does_not_reparse(self):
+        cold = t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        self.assertEqual((cold.parse_cache.hits, cold.parse_cache.misses), (0, 3))
+        warm = t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        self.assertEqual((warm.parse_cache.hits, warm.parse_cache.misses), (3, 0))
+        self.assertEqual(warm.terraform_config, t.Validator(self.terraform_dir).terraform_config)
+
+    def test_changed_file_is_reparsed(self):
+        t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        file_name = os.path.join(self.terraform_dir, "2.tf")
+        with open(file_name, "w") as fp:
+            fp.write('resource "aws_instance" "bar" {\n    value = 3\n}\n')
+        os.utime(file_name, (time.time() + 10, time.time() + 10))
+
+        v = t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        self.assertEqual((v.parse_cache.hits, v.parse_cache.misses), (2, 1))
+        self.assertEqual(v.terraform_config['resource']['aws_instance']['bar'], {'value': 3})
+        self.assertNotIn('aws_elb', v.terraform_config['resource'])
+
+    def test_cache_size_is_bounded(self):
+        v = t.Validator(self.terraform_dir, cache_dir=self.cache_dir, cache_size=1)
+        self.assertTrue(v.parse_cache.cache_size() <= 1)
+
+    def test_eviction_goes_below_max_size(self):
+        v = t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        parse_cache = v.parse_cache
+        parse_cache.max_size = parse_cache.cache_size() - 1
+        parse_cache.evict()
+        self.assertTrue(parse_cache.cache_size() <= parse_cache.max_size * parse_cache.LOW_WATER_MARK)
+        self.assertEqual(parse_cache.total_size, parse_cache.cache_size())
+
+    def test_backends_do_not_share_entries(self):
+        t.Validator(self.terraform_dir, cache_dir=self.cache_dir, parser_backend=t.TerraformPyhclBackend())
+        v = t.Validator(self.terraform_dir, cache_dir=self.cache_dir, parser_backend=t.TerraformPyhclParserBackend())
+        self.assertEqual((v.parse_cache.hits, v.parse_cache.misses), (0, 3))
+
+    def test_entries_removed_by_another_process(self):
+        v = t.Validator(self.terraform_dir, cache_dir=self.cache_dir)
+        entries = v.parse_cache.entries()
+        os.remove(entries[0][2])
+        v.parse_cache.entries = lambda: entries
+        v.parse_cache.max_size = 0
+        v.parse_cache.evict()
+        self.assertEqual(v.parse_cache.total_size, 0)
+        v.parse_cache.clear()
+
+    def test_workers_share_a_cache_and_report_hits(self):
+        cold = t.Validator(self.terraform_dir, cache_dir=self.cache_dir, workers=2)
+        self.assertEqual((cold.parse_cache.hits, cold.parse_cache.misses), (0, 3))
+        warm = t.Validator(self.terraform_dir, cache_dir=self.cache_dir, workers=2)
+        self.assertEqual((warm.parse_cache.hits, warm.parse_cache.misses), (3, 0))
+
+    def test_worker_keeps_one_cache_between_files(self):
+        tv_module._init_parse_worker(self.cache_dir, 1024 * 1024, None)
+        self.addCleanup(setattr, tv_module, "_worker_validator", None)
+        parse_cache = tv_module._worker_validator.parse_cache
+        for file_name in ["1.tf", "2.tf"]:
+            terraform, hits, misses, duration = tv_module._parse_terraform_file(os.path.join(self.terraform_dir, file_name))
+            self.assertEqual((hits, misses), (0, 1))
+        self.assertIs(tv_module._worker_validator.parse_cache, parse_cache)
+        self.assertEqual(parse_cache.total_size, parse_cache.cache_size())
+
+
+class TestValidatorRegistry(TerraformDirectoryTestCase):
+
+    def setUp(self):
+        super(TestValidatorRegistry, self).setUp()
+        t.Validator.clear_registry()
+
+    def tearDown(self):
+        super(TestValidatorRegistry, self).tearDown()
+        t.Validator.clear_registry()
+
+    def test_for_path_shares_parsed_config(self):
+        a = t.Validator.for_path(self.terraform_dir)
+        b = t.Validator.for_path(os.path.join(self.terraform_dir, "nested", ".."))
+        self.assertIsNot(a, b)
+        self.assertIs(a.terraform_config, b.terraform_config)
+
+    def test_for_path_keeps_flags_per_instance(self):
+        a = t.Validator.for_path(self.terraform_dir)
+        b = t.Validator.for_path(self.terraform_dir)
+        a.enable_variable_expansion()
+        a.error_if_property_missing()
+        self.assertFalse(b.variable_expand)
+        self.assertFalse(b.raise_error_if_property_missing)
+
+    def test_for_path_reloads_changed_files(self):
+        a = t.Validator.for_path(self.terraform_dir)
+        file_name = os.path.join(self.terraform_dir, "2.tf")
+        with open(file_name, "w") as fp:
+            fp.write('resource "aws_instance" "bar" {\n    value = 3\n}\n')
+        os.utime(file_name, (time.time() + 10, time.time() + 10))
+
+        self.assertIs(t.Validator.for_path(self.terraform_dir).terraform_config, a.terraform_config)
+        b = t.Validator.for_path(self.terraform_dir, check_for_changes=True)
+        self.assertEqual(b.terraform_config['resource']['aws_instance']['bar'], {'value': 3})
+
+    def test_for_path_keeps_configurations_per_option(self):
+        a = t.Validator.for_path(self.terraform_dir, parser_backend=t.TerraformPyhclBackend())
+        b = t.Validator.for_path(self.terraform_dir, parser_backend=t.TerraformPyhclBackend(), profiler=t.TerraformProfiler())
+        c = t.Validator.for_path(self.terraform_dir, parser_backend=t.TerraformPyhclParserBackend())
+        d = t.Validator.for_path(self.terraform_dir, workers=2)
+        self.assertIs(a.terraform_config, b.terraform_config)
+        self.assertIsNot(a.terraform_config, c.terraform_config)
+        self.assertIsNot(a.terraform_config, d.terraform_config)
+        self.assertEqual(a.terraform_config, d.terraform_config)
+
+    def test_clear_registry(self):
+        a = t.Validator.for_path(self.terraform_dir)
+        t.Validator.clear_registry(self.terraform_dir)
+        self.assertEqual(len(t.Validator.registry), 0)
+        self.assertIsNot(t.Validator.for_path(self.terraform_dir).terraform_config, a.terraform_config)
+
+
+class TestTerraformSnapshot(TerraformDirectoryTestCase):
+
+    def setUp(self):
+        super(TestTerraformSnapshot, self).setUp()
+        self.rules = [t.TerraformRule("instance", "aws_instance", "value", "should_equal", 1),
+                      t.TerraformRule("elb", ["aws_elb"], "value", "should_equal", 1)]
+
+    def change_elb(self):
+        with open(os.path.join(self.terraform_dir, "2.tf"), "w") as fp:
+            fp.write('resource "aws_instance" "bar" {\n    value = 1\n}\n\nresource "aws_elb" "buzz" {\n    value = 2\n}\n')
+
+    def test_only_affected_rules_are_run_again(self):
+        snapshot = t.TerraformSnapshot(self.terraform_dir)
+        v = t.Validator.from_snapshot(snapshot)
+        self.assertEqual(v.terraform_config, t.Validator(self.terraform_dir).terraform_config)
+        instance, elb = v.check_all(self.rules)
+        self.assertFalse(instance.passed)
+        self.assertTrue(elb.passed)
+
+        self.change_elb()
+        v = t.Validator.from_snapshot(snapshot, changed_files=[os.path.join(self.terraform_dir, "2.tf")])
+        self.assertEqual(snapshot.affected_resource_types, set(['aws_elb']))
+        cached_instance, changed_elb = v.check_all(self.rules)
+        self.assertIs(cached_instance, instance)
+        self.assertEqual(changed_elb.errors, ["[aws_elb.buzz.value] should be '1'. Is: '2'"])
+
+    def test_changed_files_are_detected(self):
+        snapshot = t.TerraformSnapshot(self.terraform_dir)
+        t.Validator.from_snapshot(snapshot).check_all(self.rules)
+        snapshot_file = os.path.join(self.terraform_dir, "snapshot.pickle")
+        snapshot.save(snapshot_file)
+
+        os.remove(os.path.join(self.terraform_dir, "nested", "3.tf"))
+        snapshot = t.TerraformSnapshot.load(snapshot_file)
+        v = t.Validator.from_snapshot(snapshot)
+        self.assertEqual(snapshot.affected_resource_types, None)
+        self.assertEqual([result.passed for result in v.check_all(self.rules)], [True, True])
+
+    def test_files_missing_from_the_snapshot_are_parsed(self):
+        snapshot = t.TerraformSnapshot(self.terraform_dir)
+        v = t.Validator.from_snapshot(snapshot, changed_files=[os.path.join(self.terraform_dir, "2.tf")])
+        self.assertEqual(v.terraform_config, t.Validator(self.terraform_dir).terraform_config)
+
+        with open(os.path.join(self.terraform_dir, "4.tf"), "w") as fp:
+            fp.write('resource "aws_elb" "new" {\n    value = 1\n}\n')
+        v = t.Validator.from_snapshot(snapshot, changed_files=[])
+        self.assertEqual(sorted(v.terraform_config['resource']['aws_elb'].keys()), ['buzz', 'new'])
+        self.assertEqual(snapshot.affected_resource_types, set(['aws_elb']))
+
+    def test_rule_names_must_be_unique(self):
+        v = t.Validator.from_snapshot(t.TerraformSnapshot(self.terraform_dir))
+        rules = [t.TerraformRule("x", "aws_instance", "value", "should_equal", 1),
+                 t.TerraformRule("x", "aws_elb", "value", "should_equal", 1)]
+        self.assertRaises(t.TerraformRuleException, v.check_all, rules)
+
+    def test_unchanged_files_keep_results(self):
+        snapshot = t.TerraformSnapshot(self.terraform_dir)
+        results = t.Validator.from_snapshot(snapshot).check_all(self.rules)
+        v = t.Validator.from_snapshot(snapshot)
+        self.assertEqual(snapshot.affected_resource_types, set())
+        self.assertEqual(v.check_all(self.rules), results)
+
+
+class TestTerraformWatcher(TerraformDirectoryTestCase):
+
+    def setUp(self):
+        super(TestTerraformWatcher, self).setUp()
+        self.watcher = t.TerraformWatcher(self.terraform_dir, interval=0)
+        self.watcher.register(t.TerraformRule("elb", "aws_elb", "value", "should_equal", 1))
+
+    def write(self, file_name, content):
+        with open(os.path.join(self.terraform_dir, file_name), "w") as fp:
+            fp.write(content)
+
+    def test_poll_only_checks_again_after_a_change(self):
+        self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual(self.watcher.poll(), None)
+
+        self.write("2.tf", 'resource "aws_elb" "buzz" {\n    value = 22\n}\n')
+        self.assertEqual(self.watcher.poll(), ["[aws_elb.buzz.value] should be '1'. Is: '22'"])
+        self.assertEqual(sorted(self.watcher.validator.terraform_config['resource']['aws_instance'].keys()), ['bizz', 'foo'])
+
+        os.remove(os.path.join(self.terraform_dir, "2.tf"))
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_registered_functions_are_checked(self):
+        self.watcher.poll()
+
+        def check(v):
+            v.resources("aws_instance").property("value").should_equal(1)
+
+        self.watcher.register(check)
+        self.assertEqual(self.watcher.poll(), ["[aws_instance.bizz.value] should be '1'. Is: '2'"])
+
+    def test_invalid_syntax_is_reported(self):
+        self.watcher.poll()
+        self.write("2.tf", 'resource "aws_elb" "buzz" {')
+        self.assertIn("Invalid terraform configuration in", self.watcher.poll()[0])
+        self.assertEqual(self.watcher.poll(), None)
+
+        self.write("2.tf", 'resource "aws_elb" "buzz" {\n    value = 2\n}\n')
+        self.assertEqual(self.watcher.poll(), ["[aws_elb.buzz.value] should be '1'. Is: '2'"])
+
+    def test_validator_options_are_kept(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        profiler = t.TerraformProfiler()
+        watcher = t.TerraformWatcher(self.terraform_dir, interval=0, cache_dir=cache_dir, profiler=profiler)
+        watcher.validator.error_if_property_missing()
+        checked = []
+        watcher.register(lambda v: checked.append((v.profiler, v.raise_error_if_property_missing)))
+        watcher.poll()
+        self.assertEqual(watcher.validator.parse_cache.misses, 3)
+
+        self.write("2.tf", 'resource "aws_elb" "buzz" {\n    value = 2\n}\n')
+        watcher.poll()
+        self.assertTrue(watcher.validator.raise_error_if_property_missing)
+        self.assertEqual(watcher.validator.parse_cache.misses, 4)
+        self.assertEqual(checked, [(profiler, True)] * 2)
+
+    def test_run(self):
+        results = []
+        self.watcher.run(results.append, iterations=2)
+        self.assertEqual(results, [[]])
+
+
+class TestTerraformProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+
+    def test_disabled_by_default(self):
+        v = t.Validator(self.path)
+        self.assertEqual(v.profiler, None)
+        v.resources("aws_elb").property("value").should_equal(1)
+
+    def test_records_phases(self):
+        events = []
+        profiler = t.TerraformProfiler(events.append)
+        v = t.Validator(self.path, profiler=profiler)
+        v.enable_variable_expansion()
+        v.resources(["aws_instance", "aws_elb"]).property("value").should_not_equal(3)
+        self.assertRaises(AssertionError, v.resources("aws_instance").property("value").should_equal, 1)
+        v.get_interpolated_value("var.foo")
+        v.check_all([t.TerraformRule("elb", "aws_elb", "value", "should_equal", 1)])
+
+        self.assertEqual(events, profiler.events)
+        self.assertEqual(sorted(event.name for event in events if event.phase == "parse"),
+                         sorted(v.list_terraform_files(self.path)))
+        self.assertEqual([(event.phase, event.name, event.count) for event in events if event.phase != "parse"], [
+            ("resources", "['aws_instance', 'aws_elb']", 4),
+            ("property", "value", 4),
+            ("assertion", "should_not_equal", 4),
+            ("resources", "aws_instance", 3),
+            ("property", "value", 3),
+            ("assertion", "should_equal", 3),
+            ("format", "errors", 1),
+            ("interpolation", "var.foo", None),
+            ("check_all", "rules", 1),
+        ])
+        self.assertEqual(profiler.summary()[("property", "value")][0], 2)
+        self.assertEqual(profiler.summary()[("property", "value")][2], 7)
+        report = profiler.report(limit=3).split("\n")
+        self.assertEqual(len(report), 4)
+        self.assertTrue(report[0].startswith("phase"))
+
+    def test_enable_and_disable(self):
+        v = t.Validator(self.path)
+        profiler = v.enable_profiling()
+        v.resources("aws_elb")
+        v.disable_profiling()
+        v.resources("aws_elb")
+        self.assertEqual([event.phase for event in profiler.events], ["resources"])
+        profiler.clear()
+        self.assertEqual(profiler.events, [])
+
+    def test_parse_in_workers(self):
+        profiler = t.TerraformProfiler()
+        t.Validator(self.path, workers=2, profiler=profiler)
+        self.assertEqual(sorted(event.name for event in profiler.events),
+                         sorted(t.Validator().list_terraform_files(self.path)))
+
+
+class TestValidatorFileStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+        self.v = t.Validator()
+
+    def test_one_validator_per_file(self):
+        self.v.enable_variable_expansion()
+        resources = []
+        for v in self.v.iter_file_validators(self.path):
+            self.assertTrue(v.variable_expand)
+            self.assertEqual(sorted(v.terraform_config['variable'].keys()), ['bar', 'foo'])
+            resources.append(sorted(v.terraform_config['resource'].keys()))
+        self.assertEqual(sorted(resources), [['aws_elb', 'aws_instance'], ['aws_instance'], ['aws_instance']])
+        self.assertEqual(self.v.parse_terraform_variables(self.v.list_terraform_files(self.path)),
+                         {'variable': {'foo': {'default': '1'}, 'bar': {'default': '2'}}})
+
+    def test_each_file_is_parsed_once(self):
+        parsed = []
+        parse_terraform_file = self.v.parse_terraform_file
+        self.v.parse_terraform_file = lambda file_name: parsed.append(file_name) or parse_terraform_file(file_name)
+        for v in self.v.iter_file_validators(self.path):
+            self.assertEqual(sorted(v.terraform_config['variable'].keys()), ['bar', 'foo'])
+        self.assertEqual(sorted(parsed), sorted(self.v.list_terraform_files(self.path)))
+
+    def test_variable_block_regex(self):
+        for source in ['variable "foo" {}', 'variable foo { default = "x" }', '  variable foo-bar {\n}',
+                       '{"variable": {"foo": {}}}', '{"resource": {}, "variable" : {}}']:
+            self.assertIsNotNone(self.v.variable_block_regex.search(source), source)
+        for source in ['resource "aws_instance" "foo" {}', 'variables = 1', 'value = "variable"']:
+            self.assertIsNone(self.v.variable_block_regex.search(source), source)
+
+    def test_check_files_matches_check_all(self):
+        rules = [t.TerraformRule("value", ["aws_instance", "aws_elb"], "value", "should_equal", 1),
+                 t.TerraformRule("missing", "aws_.*", None, "should_have_properties", ["tags"])]
+        results = self.v.check_files(self.path, rules)
+        expected = t.Validator(self.path).check_all(rules)
+        self.assertEqual([result.rule for result in results], rules)
+        self.assertEqual([result.errors for result in results], [result.errors for result in expected])
+
+    def test_violations_are_collected_across_files(self):
+        collector = self.v.collect_violations()
+        for v in self.v.iter_file_validators(self.path):
+            v.resources("aws_instance").property("value").should_equal(2)
+        self.assertEqual(collector.messages(), ["[aws_instance.bar.value] should be '2'. Is: '1'",
+                                                "[aws_instance.foo.value] should be '2'. Is: '1'"])
+
+
+class TestTerraformParserBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+        self.terraform_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.terraform_dir)
+
+    def test_backends_give_the_same_results(self):
+        v = t.Validator()
+        for file_name in v.list_terraform_files(self.path):
+            with open(file_name) as fp:
+                content = fp.read()
+            for backend in [t.TerraformPyhclParserBackend(), t.TerraformPyhclBackend()]:
+                self.assertEqual(backend.parse(content), hcl.loads(content))
+            self.assertEqual(t.TerraformJsonBackend().parse(json.dumps(hcl.loads(content))), hcl.loads(content))
+
+    def test_backend_is_chosen_by_extension(self):
+        v = t.Validator()
+        self.assertEqual(v.get_parser_backend("main.tf").name, "pyhcl-parser")
+        self.assertEqual(v.get_parser_backend("main.tf.json").name, "json")
+        v = t.Validator(parser_backend=t.TerraformPyhclBackend())
+        self.assertEqual(v.get_parser_backend("main.tf.json").name, "pyhcl")
+
+    def test_reused_parser_recovers_from_syntax_errors(self):
+        v = t.Validator()
+        self.assertRaises(t.TerraformSyntaxException, v.parse_terraform_string, "1.tf", 'resource "aws_elb" "buzz" {')
+        self.assertEqual(v.parse_terraform_string("1.tf", 'variable "foo" {}'), {'variable': {'foo': {}}})
+        self.assertRaises(t.TerraformSyntaxException, v.parse_terraform_string, "1.tf.json", '{"variable": ')
+
+    def test_tf_json_files_are_loaded(self):
+        for file_name in t.Validator().list_terraform_files(self.path):
+            with open(file_name) as fp:
+                terraform = hcl.loads(fp.read())
+            with open(os.path.join(self.terraform_dir, os.path.basename(file_name) + ".json"), "w") as fp:
+                json.dump(terraform, fp)
+        expected = t.Validator(self.path).terraform_config
+        for workers in [None, 2]:
+            self.assertEqual(t.Validator(self.terraform_dir, workers=workers).terraform_config, expected)
+        v = t.Validator()
+        self.assertEqual(v.parse_terraform_variables(v.list_terraform_files(self.terraform_dir)),
+                         {'variable': {'foo': {'default': '1'}, 'bar': {'default': '2'}}})
+
+
+class TestValidatorModules(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/modules")
+        self.terraform_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.terraform_dir)
+
+    def test_local_modules_are_loaded(self):
+        v = t.Validator()
+        modules = v.load_modules(self.path)
+        self.assertEqual([module.name for module in modules.values()], ["", "web", "db", "network", "network.subnets"])
+        self.assertEqual(modules[("web",)].inputs, {"instance_type": "t2.micro"})
+        self.assertEqual(modules[("network", "subnets")].source, os.path.join(self.path, "modules", "subnets"))
+        self.assertEqual(sorted(v.terraform_config['resource'].keys()), ["aws_s3_bucket"])
+
+    def test_sources_are_parsed_once(self):
+        v = t.Validator()
+        parsed = []
+        parse_terraform_file = v.parse_terraform_file
+        v.parse_terraform_file = lambda file_name: parsed.append(file_name) or parse_terraform_file(file_name)
+        modules = v.load_modules(self.path)
+        self.assertEqual(len(parsed), 4)
+        self.assertIs(modules[("web",)].terraform, modules[("db",)].terraform)
+
+    def test_queries_can_be_scoped_to_a_module(self):
+        for workers in [None, 2]:
+            v = t.Validator(workers=workers)
+            v.load_modules(self.path)
+            v.enable_variable_expansion()
+            subnets = v.module("network.subnets")
+            self.assertEqual(subnets.module_path, ("network", "subnets"))
+            self.assertTrue(subnets.variable_expand)
+            subnets.resources("aws_subnet").property("cidr_block").should_match_regex("^10\\.0\\.[12]\\.0/24$")
+            v.module(("web",)).resources("aws_instance").property("instance_type").should_equal("t2.small")
+            self.assertEqual(v.resources("aws_instance").resource_list, [])
+            self.assertEqual([len(module.resources("aws_.*").resource_list) for module in v.iter_module_validators()], [1, 1, 1, 1, 2])
+
+    def test_violations_carry_the_module_path(self):
+        v = t.Validator()
+        v.load_modules(self.path)
+        subnets = v.module(u"network.subnets")
+        collector = subnets.collect_violations()
+        subnets.resources("aws_subnet").property("cidr_block").should_equal("10.0.1.0/24")
+        self.assertEqual([violation.module_path for violation in collector.violations], [("network", "subnets")])
+        self.assertEqual(collector.messages(), ["module.network.module.subnets: [aws_subnet.private.cidr_block] should be '10.0.1.0/24'. Is: '10.0.2.0/24'"])
+
+        rules = [t.TerraformRule("cidr", "aws_subnet", "cidr_block", "should_equal", "10.0.1.0/24")]
+        self.assertEqual(subnets.check_all(rules)[0].errors, collector.messages())
+        self.assertEqual(v.check_all(rules)[0].errors, [])
+
+    def test_module_errors(self):
+        v = t.Validator()
+        self.assertRaises(t.TerraformModuleException, v.module, "web")
+        v.load_modules(self.path)
+        self.assertRaises(t.TerraformModuleException, v.module, "network.missing")
+
+        with open(os.path.join(self.terraform_dir, "main.tf"), "w") as fp:
+            fp.write('module "missing" {\n    source = "./missing"\n}\n')
+        self.assertRaises(t.TerraformModuleException, v.load_modules, self.terraform_dir)
+        with open(os.path.join(self.terraform_dir, "main.tf"), "w") as fp:
+            fp.write('module "self" {\n    source = "./"\n}\n')
+        self.assertRaises(t.TerraformModuleException, v.load_modules, self.terraform_dir)
+
+
+class TestTerraformPropertyTable(unittest.TestCase):
+
+    def setUp(self):
+        self.numpy = tv_module.numpy
+        self.v = t.Validator({
+            'variable': {'size': {'default': '10'}},
+            'resource': {
+                'aws_instance': {
+                    'a': {'value': 1, 'tags': {'Name': 'a'}},
+                    'b': {'value': '1', 'tags': {'Name': 'b'}},
+                    'c': {'value': True, 'tags': {'Name': 'c'}},
+                    'd': {'value': ['1'], 'tags': {'Name': 'd\x00'}},
+                    'e': {'value': '${var.size}', 'tags': {'Name': 'e'}},
+                },
+            },
+        })
+
+    def tearDown(self):
+        tv_module.numpy = self.numpy
+
+    def table(self, name):
+        return self.v.resources("aws_instance").property(name).table()
+
+    def errors(self, check, *args):
+        try:
+            check(*args)
+        except AssertionError as e:
+            return str(e)
+        return None
+
+    def test_columns(self):
+        table = self.v.resources("aws_instance").property("tags").property("Name").table()
+        rows = sorted(zip(table.resource_types, table.resource_names, table.property_paths, table.values))
+        self.assertEqual(len(table), 5)
+        self.assertEqual(rows[0], ("aws_instance", "a", "tags.Name", "a"))
+        self.assertEqual(sorted(table.values), ["a", "b", "c", "d\x00", "e"])
+
+    def test_same_errors_as_property_list(self):
+        for numpy in [self.numpy, None]:
+            tv_module.numpy = numpy
+            for variable_expand in [False, True]:
+                self.v.variable_expand = variable_expand
+                for name, check, value in [("value", "should_equal", 1), ("value", "should_not_equal", "True"),
+                                           ("value", "should_equal", ["1"]), ("tags", "should_not_equal", {"Name": "a"}),
+                                           ("value", "should_be_one_of", [1, "10"]), ("value", "should_not_be_one_of", [True, ["1"]]),
+                                           ("value", "should_be_one_of", "True")]:
+                    expected = self.errors(getattr(self.v.resources("aws_instance").property(name), check), value)
+                    self.assertEqual(self.errors(getattr(self.table(name), check), value), expected)
+
+    def test_failing_rows(self):
+        for numpy in [self.numpy, None]:
+            tv_module.numpy = numpy
+            table = self.v.resources("aws_instance").property("tags").property("Name").table()
+            names = table.resource_names
+            self.assertEqual(sorted(names[row] for row in table.should_equal_rows("a")), ["b", "c", "d", "e"])
+            self.assertEqual([names[row] for row in table.should_not_equal_rows("a")], ["a"])
+            self.assertEqual(sorted(names[row] for row in table.should_be_one_of_rows(["a", "d\x00"])), ["b", "c", "e"])
+            self.assertEqual([names[row] for row in table.should_not_be_one_of_rows(["d"])], [])
+            self.assertEqual(table.should_equal_rows("d"), table.should_be_one_of_rows(["d"]))
+
+    def test_long_values_are_stored_as_codes(self):
+        if self.numpy is None:
+            self.skipTest("NumPy is not installed")
+        self.v.resources("aws_instance").resource_list[0].config['tags']['Name'] = "x" * 10000
+        table = self.v.resources("aws_instance").property("tags").property("Name").table()
+        self.assertEqual(table.code_array.dtype.kind, 'i')
+        self.assertEqual(len(table.should_equal_rows("x" * 10000)), 4)
+
+
+class TestTerraformViolation(unittest.TestCase):
+
+    def setUp(self):
+        self.v = t.Validator({'resource': {'aws_instance': dict(("foo{0}".format(i), {'value': i, 'tags': ['a', 1]})
+                                                                for i in range(5))}})
+
+    def test_messages_are_formatted_when_needed(self):
+        collector = self.v.collect_violations()
+        self.v.resources("aws_instance").property("value").should_equal(0)
+        self.assertEqual([violation._message for violation in collector.violations], [None] * 4)
+        self.assertEqual(collector.messages()[0], "[aws_instance.foo1.value] should be '0'. Is: '1'")
+        self.assertEqual(str(collector.violations[0]), collector.violations[0].message)
+
+        collector.clear()
+        self.v.resources("aws_instance").property("tags").list_should_contain(['b'])
+        self.assertEqual(collector.violations[0].actual, ['a', 1])
+        self.assertEqual(collector.messages()[0], "[aws_instance.foo0.tags] '['a', '1']' should contain '['b']'.")
+
+    def test_rule_results_format_errors_when_needed(self):
+        result = self.v.check_all([t.TerraformRule("value", "aws_instance", "value", "should_equal", 0)])[0]
+        self.assertFalse(result.passed)
+        self.assertEqual(result._errors, None)
+        self.assertEqual(len(result.errors), 4)
+
+    def test_error_messages_can_be_limited(self):
+        self.v.limit_error_messages(2)
+        with self.assertRaises(AssertionError) as context:
+            self.v.resources("aws_instance").property("value").should_equal(0)
+        self.assertEqual(str(context.exception).split("\n"), [
+            "[aws_instance.foo1.value] should be '0'. Is: '1'",
+            "[aws_instance.foo2.value] should be '0'. Is: '2'",
+            "... 2 more errors, 4 in total",
+        ])
+        self.v.limit_error_messages(4)
+        self.assertRaisesRegexp(AssertionError, "^(\\[aws_instance[^\n]*\n){3}[^\n]*'4'$",
+                                self.v.resources("aws_instance").property("value").should_equal, 0)
+
+        collector = self.v.collect_violations()
+        self.v.resources("aws_instance").property("value").should_equal(0)
+        with self.assertRaises(AssertionError) as context:
+            collector.raise_errors(max_messages=1)
+        self.assertEqual(str(context.exception), "[aws_instance.foo1.value] should be '0'. Is: '1'\n... 3 more errors, 4 in total")
+
+
+class TestValidatorListChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.v = t.Validator({'resource': {'aws_iam_policy': {'foo': {
+            'actions': ["s3:action{0}".format(i) for i in range(2000)],
+            'statements': [{'effect': 'Allow'}, 'deny'],
+            'name': 'foo-policy',
+            'tags': {'Name': 'foo'},
+        }}}})
+        self.collector = self.v.collect_violations()
+
+    def check(self, property_name, check, values):
+        self.collector.clear()
+        getattr(self.v.resources("aws_iam_policy").property(property_name), check)(values)
+        return [violation.expected for violation in self.collector.violations]
+
+    def test_lists(self):
+        self.assertEqual(self.check("actions", "list_should_contain", ["s3:action1999", "s3:action0", "s3:missing"]), [["s3:missing"]])
+        self.assertEqual(self.check("actions", "list_should_not_contain", ["s3:missing", "s3:action5", "s3:action5"]),
+                         [["s3:action5", "s3:action5"]])
+
+    def test_unhashable_values(self):
+        self.assertEqual(self.check("statements", "list_should_contain", [{'effect': 'Allow'}, 'deny', {'effect': 'Deny'}]),
+                         [[{'effect': 'Deny'}]])
+        self.assertEqual(self.check("statements", "list_should_not_contain", [{'effect': 'Allow'}, 'allow']),
+                         [[{'effect': 'Allow'}]])
+
+    def test_strings_and_maps(self):
+        self.assertEqual(self.check("name", "list_should_contain", ["policy", "bar"]), [["bar"]])
+        self.assertEqual(self.check("tags", "list_should_not_contain", ["Name", "owner"]), [["Name"]])
+        self.assertEqual(self.check("tags", "should_have_properties", ["Name", "owner"]), ["owner"])
+        self.assertEqual(self.check("tags", "should_not_have_properties", ["Name", "owner"]), [None])
+
+
+@unittest.skipIf(asyncio is None, "asyncio is not available")
+class TestValidatorAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/multiple_files")
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_aload(self):
+        expected = t.Validator(self.path).terraform_config
+        for executor_class in [ThreadPoolExecutor, ProcessPoolExecutor]:
+            executor = executor_class(2)
+            try:
+                loads = [t.Validator.aload(self.path, executor=executor, loop=self.loop) for i in range(4)]
+                validators = self.loop.run_until_complete(asyncio.gather(*loads))
+            finally:
+                executor.shutdown()
+            self.assertEqual([v.terraform_config for v in validators], [expected] * 4)
+            self.assertTrue(all(isinstance(v, t.Validator) for v in validators))
+
+    def test_running_loop_is_used(self):
+        # Without a loop argument, the future belongs to the loop that is running when aload() is called
+        load = self.loop.create_future()
+        self.loop.call_soon(lambda: load.set_result(t.Validator.aload(self.path, workers=None)))
+        v = self.loop.run_until_complete(self.loop.run_until_complete(load))
+        self.assertEqual(v.terraform_config, t.Validator(self.path).terraform_config)
+
+    def test_aload_errors(self):
+        path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures/invalid_syntax")
+        self.assertRaises(t.TerraformSyntaxException, self.loop.run_until_complete, t.Validator.aload(path, loop=self.loop))
+
+    def test_acheck_all(self):
+        v = self.loop.run_until_complete(t.Validator.aload(self.path, loop=self.loop, workers=None))
+        rule = t.TerraformRule("value", "aws_instance", "value", "should_equal", 1)
+        results = self.loop.run_until_complete(v.acheck_all([rule], loop=self.loop))
+        self.assertEqual(results[0].errors, ["[aws_instance.bizz.value] should be '1'. Is: '2'"])
+
+
 class TestTerraformVariableParser(unittest.TestCase):
 
     def test_simple_parse(self):
@@ -124,3 +970,41 @@ class TestTerraformVariableParser(unittest.TestCase):
         a.parse()
         self.assertEqual(a.variable, 'lol')
         self.assertEqual(a.functions, ['lower','upper'])
+
+    def test_nested_function_with_multiple_arguments_parse(self):
+        a = t.TerraformVariableParser('replace(lower(var.lol), "a,b", "c")')
+        a.parse()
+        self.assertEqual(a.variable, 'lol')
+        self.assertEqual(a.functions, ['replace', 'lower'])
+        self.assertEqual(a.ast, ('call', 'replace', [('call', 'lower', [('variable', 'lol')]), ('literal', 'a,b'), ('literal', 'c')]))
+
+    def test_non_variable_reference_parse(self):
+        a = t.TerraformVariableParser("lower(aws_instance.foo.*.id)")
+        a.parse()
+        self.assertEqual(a.variable, '')
+        self.assertEqual(a.functions, [])
+
+    def test_parsed_expressions_are_cached(self):
+        a = t.TerraformVariableParser("upper(var.cached)")
+        a.parse()
+        b = t.TerraformVariableParser("upper(var.cached)")
+        b.parse()
+        self.assertIs(a.ast, b.ast)
+        self.assertIn("upper(var.cached)", t.TerraformVariableParser.cache)
+
+    def test_parsed_expression_cache_is_bounded(self):
+        cache_size = t.TerraformVariableParser.cache_size
+        t.TerraformVariableParser.cache_size = 2
+        try:
+            for expression in ["var.a", "var.b", "var.a", "var.c"]:
+                t.TerraformVariableParser(expression).parse()
+            self.assertEqual(list(t.TerraformVariableParser.cache.keys())[-2:], ["var.a", "var.c"])
+            self.assertNotIn("var.b", t.TerraformVariableParser.cache)
+            t.TerraformVariableParser.clear_cache()
+            self.assertEqual(len(t.TerraformVariableParser.cache), 0)
+        finally:
+            t.TerraformVariableParser.cache_size = cache_size
+
+    def test_invalid_expression_parse(self):
+        a = t.TerraformVariableParser("lower(var.lol")
+        self.assertRaises(t.TerraformUnimplementedInterpolationException, a.parse)